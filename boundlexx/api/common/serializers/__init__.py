@@ -44,6 +44,7 @@ from boundlexx.api.common.serializers.recipe import (
 from boundlexx.api.common.serializers.shop import (
     ItemRequestBasketPriceSerializer,
     ItemShopStandPriceSerializer,
+    PriceChangeSerializer,
     WorldRequestBasketPriceSerializer,
     WorldShopStandPriceSerializer,
 )
@@ -115,6 +116,7 @@ __all__ = [
     "NullSerializer",
     "PossibleItemWBCSerializer",
     "PossibleWBCSerializer",
+    "PriceChangeSerializer",
     "RecipeGroupSerializer",
     "RecipeInputSerializer",
     "RecipeLevelSerializer",
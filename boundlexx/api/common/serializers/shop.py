@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from boundlexx.api.common.serializers.base import LocationSerializer
+from boundlexx.api.common.serializers.base import LocationSerializer, NullSerializer
 from boundlexx.api.common.serializers.item import IDItemSerializer
 from boundlexx.api.common.serializers.world import IDWorldSerializer
 from boundlexx.boundless.models import ItemRequestBasketPrice, ItemShopStandPrice
@@ -81,3 +81,22 @@ class ItemRequestBasketPriceSerializer(BaseItemShopSerializer):
             "guild_tag",
             "shop_activity",
         ]
+
+
+class PriceChangeShopSerializer(NullSerializer):
+    location = serializers.DictField(child=serializers.IntegerField())
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    item_count = serializers.IntegerField()
+    beacon_name = serializers.CharField()
+    guild_tag = serializers.CharField()
+
+
+class PriceChangeSerializer(NullSerializer):
+    id = serializers.CharField(  # noqa: A003
+        help_text="Stream ID, pass as `since` to resume",
+    )
+    item_id = serializers.IntegerField()
+    world_id = serializers.IntegerField()
+    price_type = serializers.ChoiceField(choices=["request-basket", "shop-stand"])
+    added = PriceChangeShopSerializer(many=True)
+    removed = PriceChangeShopSerializer(many=True)
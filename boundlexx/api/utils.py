@@ -1,10 +1,15 @@
+import threading
+import time
+from contextlib import contextmanager
 from datetime import timedelta
+from functools import partial
+from typing import Iterator
 
 from django.conf import settings
 from django.contrib.sites.models import Site
 from django.core.cache import cache
 from django.core.files.base import ContentFile
-from django.db import ProgrammingError
+from django.db import ProgrammingError, transaction
 from django.utils import timezone
 from django_celery_beat.models import IntervalSchedule, PeriodicTask
 from openpyxl.utils import get_column_letter
@@ -42,6 +47,21 @@ PURGE_GROUPS = {
 }
 
 
+def get_purge_paths(group: str, **kwargs) -> list[str]:
+    """
+    Returns the paths in `PURGE_GROUPS[group]` with `{key}` placeholders
+    replaced by `kwargs`.
+    """
+
+    paths = []
+    for path in PURGE_GROUPS[group]:
+        for key, value in kwargs.items():
+            path = path.replace(f"{{{key}}}", str(value))
+        paths.append(path)
+
+    return paths
+
+
 def get_list_example(example_item):
     return {
         "count": 1,
@@ -65,12 +85,96 @@ def get_base_url(admin=False):
     return f"{settings.API_PROTOCOL}://{domain}"
 
 
-def queue_purge_paths(new_paths):
-    schedule_task = False
+_purge_collector = threading.local()
+
+
+def start_purge_collector():
+    """
+    Starts collecting paths passed to `queue_purge_paths` on this thread
+    instead of queuing them right away. Can be nested, only the outermost
+    `flush_purge_collector` queues the paths.
+    """
+
+    if getattr(_purge_collector, "depth", 0) == 0:
+        _purge_collector.paths = set()
+        _purge_collector.started = None
+        _purge_collector.depth = 0
+
+    _purge_collector.depth += 1
+
+
+def flush_purge_collector():
+    """
+    Stops collecting paths and queues every collected path once the current
+    transaction (if any) commits.
+    """
+
+    depth = getattr(_purge_collector, "depth", 0)
+    if depth == 0:
+        return
+
+    _purge_collector.depth = depth - 1
+    if _purge_collector.depth > 0:
+        return
+
+    send_purge_paths()
+    _purge_collector.paths = None
+
 
+def send_purge_paths():
+    """
+    Queues the paths collected so far once the current transaction (if any)
+    commits and keeps collecting. Long running tasks call this after each
+    unit of work so purges are not held until the task finishes.
+    """
+
+    paths = getattr(_purge_collector, "paths", None)
+    if not paths:
+        return
+
+    _purge_collector.paths = set()
+    _purge_collector.started = None
+    transaction.on_commit(partial(_queue_purge_paths, paths))
+
+
+@contextmanager
+def collect_purge_paths() -> Iterator[None]:
+    """
+    Coalesces every `queue_purge_paths` call in the block into deduplicated
+    batches, sent by `send_purge_paths` and when the block exits.
+    """
+
+    start_purge_collector()
+    try:
+        yield
+    finally:
+        flush_purge_collector()
+
+
+def queue_purge_paths(new_paths):
     if not settings.AZURE_CDN_DYNAMIC_PURGE:
         return
 
+    paths = getattr(_purge_collector, "paths", None)
+    if paths is not None:
+        paths.update(new_paths)
+
+        if _purge_collector.started is None:
+            _purge_collector.started = time.monotonic()
+        if (
+            len(paths) >= settings.AZURE_CDN_PURGE_MAX_PATHS
+            or time.monotonic() - _purge_collector.started
+            >= settings.AZURE_CDN_PURGE_MAX_AGE
+        ):
+            send_purge_paths()
+        return
+
+    transaction.on_commit(partial(_queue_purge_paths, set(new_paths)))
+
+
+def _queue_purge_paths(new_paths):
+    schedule_task = False
+
     with cache.lock(PURGE_CACHE_LOCK, expire=10, auto_renewal=False):
         paths = cache.get(PURGE_CACHE_PATHS)
 
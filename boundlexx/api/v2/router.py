@@ -65,6 +65,8 @@ item_viewset.register(
 
 router.register("metals", views.MetalViewSet, basename="metal")
 
+router.register("price-changes", views.PriceChangeViewSet, basename="price-change")
+
 router.register("recipe-groups", views.RecipeGroupViewSet, basename="recipe-group")
 router.register("recipes", views.RecipeViewSet, basename="recipe")
 
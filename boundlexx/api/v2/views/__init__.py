@@ -9,6 +9,7 @@ from boundlexx.api.v2.views.item import (
 )
 from boundlexx.api.v2.views.metal import MetalViewSet
 from boundlexx.api.v2.views.recipe import RecipeGroupViewSet, RecipeViewSet
+from boundlexx.api.v2.views.shop import PriceChangeViewSet
 from boundlexx.api.v2.views.skill import SkillGroupViewSet, SkillViewSet
 from boundlexx.api.v2.views.timeseries import (
     ItemResourceTimeseriesViewSet,
@@ -27,6 +28,7 @@ __all__ = [
     "ItemResourceWorldListViewSet",
     "ItemViewSet",
     "MetalViewSet",
+    "PriceChangeViewSet",
     "RecipeGroupViewSet",
     "RecipeViewSet",
     "SkillGroupViewSet",
@@ -0,0 +1,52 @@
+import re
+from typing import Any
+
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import never_cache
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from boundlexx.api.common.serializers import PriceChangeSerializer
+from boundlexx.api.common.viewsets import BoundlexxGenericViewSet
+from boundlexx.api.schemas import DescriptiveAutoSchema
+from boundlexx.boundless.streams import price_changes
+
+STREAM_ID_REGEX = re.compile(r"^\d+(-\d+)?$")
+MAX_PRICE_CHANGES = 1000
+
+
+class PriceChangeViewSet(BoundlexxGenericViewSet):
+    schema = DescriptiveAutoSchema(tags=["items"])
+
+    permission_classes = [AllowAny]
+    serializer_class = PriceChangeSerializer
+    authentication_classes: list[Any] = []
+    filter_backends: list[Any] = []
+    pagination_class = None
+
+    # changes are not purged from the CDN, so they must never be cached
+    @method_decorator(never_cache)
+    def list(self, request, *args, **kwargs):  # noqa A003
+        """
+        Retrieves the latest changes to shop prices across all items and
+        worlds, oldest first.
+
+        Pass the `id` of the last change you have seen as `since` to only get
+        newer changes. Only a limited number of recent changes are kept.
+        """
+
+        since = request.query_params.get("since")
+        if since is not None and STREAM_ID_REGEX.match(since) is None:
+            raise ValidationError({"since": "Invalid change ID"})
+
+        try:
+            limit = int(request.query_params.get("limit", 100))
+        except ValueError as ex:
+            raise ValidationError({"limit": "Must be a number"}) from ex
+        limit = max(1, min(limit, MAX_PRICE_CHANGES))
+
+        events = price_changes.read(since=since, count=limit)
+
+        serializer = self.get_serializer(events, many=True)
+        return Response(serializer.data)
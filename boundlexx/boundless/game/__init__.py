@@ -1,17 +1,23 @@
+from boundlexx.boundless.game.async_client import AsyncBoundlessClient
 from boundlexx.boundless.game.client import BoundlessClient
 from boundlexx.boundless.game.models import (
     HTTP_ERRORS,
     Location,
     Settlement,
     ShopItem,
+    ShopRecord,
     World,
+    iter_shop_records,
 )
 
 __all__ = [
+    "AsyncBoundlessClient",
     "BoundlessClient",
     "HTTP_ERRORS",
     "Location",
     "Settlement",
     "ShopItem",
+    "ShopRecord",
     "World",
+    "iter_shop_records",
 ]
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import logging
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_LOCK_PREFIX = "boundless_client:lock:account"
+ACCOUNT_LEASE_EXPIRE = 120
+
+
+def get_account_count() -> int:
+    return len(settings.BOUNDLESS_USERNAMES)
+
+
+def get_account_user(user_index: int) -> dict:
+    user = {"boundless": {"username": settings.BOUNDLESS_USERNAMES[user_index]}}
+    if settings.BOUNDLESS_DS_REQUIRES_AUTH:
+        user["boundless"]["password"] = settings.BOUNDLESS_PASSWORDS[user_index]
+        user["steam"] = {
+            "username": settings.STEAM_USERNAMES[user_index],
+            "password": settings.STEAM_PASSWORDS[user_index],
+        }
+
+    return user
+
+
+class AccountPool:
+    """
+    Leases Boundless accounts from `BOUNDLESS_USERNAMES` so concurrent API
+    calls (like world polls) are spread across every account.
+
+    Leases are cache locks. Hold them for as little as possible (a single
+    world), so runs going at the same time share the accounts between them
+    instead of one run holding all of them until it is done.
+    """
+
+    def _lock(self, user_index: int):
+        return cache.lock(
+            f"{ACCOUNT_LOCK_PREFIX}:{user_index}",
+            expire=ACCOUNT_LEASE_EXPIRE,
+            auto_renewal=True,
+        )
+
+    @contextmanager
+    def lease(
+        self, max_accounts: Optional[int] = None, timeout: Optional[float] = None
+    ) -> Iterator[list[int]]:
+        """
+        Leases up to `max_accounts` free accounts and yields their indexes.
+        Waits up to `timeout` seconds for an account if all are in use, if
+        still none are free it yields the next account in the round robin
+        anyway (API calls are still paced per account).
+        """
+
+        count = get_account_count()
+        if max_accounts is None:
+            max_accounts = count
+        if timeout is None:
+            timeout = settings.BOUNDLESS_ACCOUNT_LEASE_TIMEOUT
+
+        locks = []
+        indexes: list[int] = []
+        for user_index in range(count):
+            if len(indexes) >= max_accounts:
+                break
+
+            lock = self._lock(user_index)
+            if lock.acquire(blocking=False):
+                locks.append(lock)
+                indexes.append(user_index)
+
+        if len(indexes) == 0 and count > 0:
+            user_index = self.next_index()
+            lock = self._lock(user_index)
+            if lock.acquire(blocking=True, timeout=timeout):
+                locks.append(lock)
+            else:
+                logger.warning("No free accounts, sharing account %s", user_index)
+            indexes.append(user_index)
+
+        try:
+            yield indexes
+        finally:
+            for lock in locks:
+                try:
+                    lock.release()
+                except Exception as ex:  # pylint: disable=broad-except
+                    logger.warning("Could not release account lease: %s", ex)
+
+    def next_index(self) -> int:
+        """
+        Round robin account index, without leasing it.
+        """
+
+        with cache.lock("boundless_client:lock:user", expire=10):
+            cache_key = "boundless_client:last_user_index"
+            user_index = cache.get(cache_key)
+
+            if user_index is None:
+                user_index = 0
+            cache.set(cache_key, (user_index + 1) % get_account_count())
+
+        return user_index
+
+
+account_pool = AccountPool()
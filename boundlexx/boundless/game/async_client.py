@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Iterable, List, Optional, Union
+
+import httpx
+from django.conf import settings
+
+from boundlexx.boundless.game.cassette import CassetteTransport, get_cassette
+from boundlexx.boundless.game.client import (
+    MAX_TRIES_API,
+    NON_API_DECREMENT,
+    BoundlessClient,
+    parse_world_response,
+)
+from boundlexx.boundless.game.models import Settlement, ShopItem, World
+from boundlexx.boundless.game.ratelimit import (
+    ds_key,
+    rate_limiter,
+    world_delays,
+    world_key,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBoundlessClient:
+    """
+    asyncio version of `BoundlessClient` for fanning out world API calls.
+
+    Every world is its own host with its own rate limit, so calls to different
+    worlds run concurrently (up to `max_concurrency`) while calls to the same
+    world are paced by the shared `rate_limiter`.
+
+    Authentication (query tokens) is delegated to a wrapped `BoundlessClient`.
+    """
+
+    client: BoundlessClient
+    _http: httpx.AsyncClient
+    _max_concurrency: int
+    _semaphore: Optional[asyncio.Semaphore]
+
+    def __init__(
+        self,
+        client: Optional[BoundlessClient] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        if client is None:
+            client = BoundlessClient()
+        if max_concurrency is None:
+            max_concurrency = settings.BOUNDLESS_API_MAX_CONCURRENCY
+
+        self.client = client
+        transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+                keepalive_expiry=settings.BOUNDLESS_API_POOL_IDLE_TIMEOUT,
+            ),
+        )
+        cassette = get_cassette()
+        if cassette is not None:
+            transport = CassetteTransport(transport, cassette)
+
+        self._http = httpx.AsyncClient(
+            timeout=settings.BOUNDLESS_API_TIMEOUT, transport=transport
+        )
+        self._max_concurrency = max_concurrency
+        # created lazily so it binds to the running event loop
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    async def _paced(self, key: str, delay: float, method: str, url: str, **kwargs):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        # reserved once a request can actually be sent, otherwise requests
+        # holding reservations would all fire at once when the semaphore frees
+        async with self._semaphore:
+            await rate_limiter.async_wait(key, delay)
+            return await self._http.request(method, url, **kwargs)
+
+    # Offical API Endpoints
+
+    async def _get_world(self, world: World, path, api_key=False):
+        delay = settings.BOUNDLESS_API_WORLD_DELAY
+        if api_key:
+            delay = await asyncio.to_thread(world_delays.get_delay, world.id)
+
+        headers = {}
+        if api_key and settings.BOUNDLESS_API_KEY:
+            headers["Boundless-API-Key"] = settings.BOUNDLESS_API_KEY
+
+        return await self._paced(
+            world_key(world.id),
+            delay,
+            "GET",
+            f"{world.api_url}{path}",
+            headers=headers,
+        )
+
+    async def _retry_world(self, path: str, world: World, api_key: bool):
+        tries = MAX_TRIES_API
+        while True:
+            response = await self._get_world(world, path, api_key=api_key)
+
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as ex:
+                # 403 with an API key can actually be a rate limit...
+                if api_key and ex.response.status_code == 403:
+                    tries -= 1
+                    # next call waits for the increased delay
+                    delay = await asyncio.to_thread(world_delays.throttled, world.id)
+                    logger.info(
+                        "403 error from API key at world: %s, %s Reties: %s, Delay: %s",
+                        world,
+                        path,
+                        tries,
+                        delay,
+                    )
+                else:
+                    tries -= NON_API_DECREMENT
+                if tries <= 0:
+                    raise
+            else:
+                if api_key:
+                    await asyncio.to_thread(world_delays.success, world.id)
+                break
+
+        return response
+
+    async def call_world_api(
+        self,
+        path: str,
+        world: World,
+        api_key=False,
+    ) -> Union[str, dict, bytes]:
+        response = await self._retry_world(path, world, api_key)
+
+        return parse_world_response(response)
+
+    async def _shop_api(
+        self,
+        item_id: int,
+        shop_type: str,
+        world: World,
+        lazy: bool = False,
+    ) -> List[ShopItem]:
+        response = await self.call_world_api(
+            f"/shopping/{shop_type}/{item_id}", world=world, api_key=True
+        )
+
+        if not isinstance(response, bytes):
+            return []
+
+        return ShopItem.from_binary(response, lazy=lazy)
+
+    async def shop_buy(
+        self,
+        item_id: int,
+        world: World,
+        lazy: bool = False,
+    ) -> List[ShopItem]:
+        return await self._shop_api(item_id, "B", world=world, lazy=lazy)
+
+    async def shop_sell(
+        self,
+        item_id: int,
+        world: World,
+        lazy: bool = False,
+    ) -> List[ShopItem]:
+        return await self._shop_api(item_id, "S", world=world, lazy=lazy)
+
+    async def get_world_settlements(self, world: World) -> List[Settlement]:
+        response = await self.call_world_api("/planet/16/5", world=world)
+
+        if not isinstance(response, bytes):
+            return []
+
+        return Settlement.from_binary(response)
+
+    # Undocumented/Private API Endpoints
+
+    async def _auth_payload(self, path, poll_token=None):
+        # login may happen here, keep it off of the event loop
+        return await asyncio.to_thread(
+            self.client.auth_payload, path, poll_token=poll_token
+        )
+
+    async def _authenticated_post(
+        self, key, delay, path, poll_token=None, api_url=None, authenticate=True
+    ):
+        data, headers = await self._auth_payload(path, poll_token=poll_token)
+
+        if api_url is None:
+            api_url = settings.BOUNDLESS_API_URL_BASE
+
+        response = await self._paced(
+            key, delay, "POST", f"{api_url}{path}", content=data, headers=headers
+        )
+
+        if response.status_code == 400 and response.text == "" and authenticate:
+            logger.warning("Invalid auth. Renewing auth...")
+            await asyncio.to_thread(self.client.invalidate_query_token)
+            return await self._authenticated_post(
+                key,
+                delay,
+                path,
+                poll_token=poll_token,
+                api_url=api_url,
+                authenticate=False,
+            )
+
+        return response
+
+    async def get_world_data(self, world: World):
+        query_token = await asyncio.to_thread(getattr, self.client, "query_token")
+
+        response = await self._authenticated_post(
+            ds_key(query_token.username),
+            settings.BOUNDLESS_API_DS_DELAY,
+            f"/gameserver/{query_token.username}/{world.id}/"
+            f"{query_token.player['id']}",
+        )
+
+        if response.status_code in (404, 410):
+            return None
+
+        response.raise_for_status()
+        return response.json()
+
+    async def get_world_poll(self, world: World, poll_token=None):
+        if poll_token is None:
+            data = await self.get_world_data(world)
+            poll_token = data["pollData"]
+
+        # picking the user may lock the account pool, keep it off of the loop
+        user = await asyncio.to_thread(getattr, self.client, "user")
+
+        response = await self._authenticated_post(
+            world_key(world.id, user["boundless"]["username"]),
+            settings.BOUNDLESS_API_WORLD_DELAY,
+            "/worldpoll",
+            poll_token=poll_token,
+            api_url=world.api_url,
+            authenticate=False,
+        )
+        response.raise_for_status()
+
+        return response.json()
+
+    # Fan out
+
+    async def gather(
+        self,
+        method: str,
+        worlds: Iterable[World],
+        *args,
+        **kwargs,
+    ) -> list[tuple[World, Any]]:
+        """
+        Calls `method` for each world concurrently. Returns a list of
+        `(world, result)` in the same order as `worlds`. If a call raised,
+        `result` is the exception instead.
+        """
+
+        worlds = list(worlds)
+        func = getattr(self, method)
+
+        results = await asyncio.gather(
+            *[func(*args, world=world, **kwargs) for world in worlds],
+            return_exceptions=True,
+        )
+
+        return list(zip(worlds, results))
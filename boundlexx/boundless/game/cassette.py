@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+import httpx
+import msgpack
+import requests
+from django.conf import settings
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+CASSETTE_SUFFIX = ".msgpack.gz"
+
+# only headers the client actually looks at are kept
+RECORDED_HEADERS = ("Content-Type",)
+
+
+class UnrecordedRequestException(Exception):
+    pass
+
+
+class Cassette:
+    """
+    Record/replay archive of Boundless API responses.
+
+    When recording, every response (status, Content-Type, raw body and how
+    long it took) is appended to a gzipped stream of msgpack records. One
+    file per process is written to `path` (a directory) so Celery workers do
+    not step on each other.
+
+    When replaying, every file in `path` is loaded and responses are served
+    back in recorded order per `(method, url)`. Request bodies are not
+    matched. Once a URL runs out of recordings the last one is repeated, a
+    URL that was never recorded raises `UnrecordedRequestException`.
+    Recorded latency is replayed scaled by `1 / speed`, `speed=0` replays
+    without any delay.
+
+    `mark` stores the wall clock time under a name while recording, so a
+    replay can line its clock up with the recording (see `marks`).
+    """
+
+    mode: str
+    path: Path
+    speed: float
+
+    def __init__(self, path: Union[str, Path], mode: str, speed: float = 1.0):
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Invalid cassette mode: {mode}")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.speed = speed
+
+        self._lock = threading.Lock()
+        self._file: Optional[gzip.GzipFile] = None
+        self._entries: dict[tuple[str, str], deque] = defaultdict(deque)
+        self._last: dict[tuple[str, str], dict] = {}
+        self.marks: dict[str, float] = {}
+
+        if self.replaying:
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == MODE_RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == MODE_REPLAY
+
+    def _load(self):
+        total = 0
+        for path in sorted(self.path.glob(f"*{CASSETTE_SUFFIX}")):
+            with gzip.open(path, "rb") as f:
+                try:
+                    for entry in msgpack.Unpacker(f, raw=False):
+                        if "n" in entry:
+                            self.marks.setdefault(entry["n"], entry["a"])
+                            continue
+
+                        self._entries[(entry["m"], entry["u"])].append(entry)
+                        total += 1
+                except EOFError:
+                    # process was killed while recording
+                    logger.warning("Cassette %s is truncated", path)
+
+        logger.info("Loaded %s recorded responses from %s", total, self.path)
+
+    # Recording
+
+    def _get_file(self) -> gzip.GzipFile:
+        if self._file is None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            name = f"{int(time.time())}-{os.getpid()}{CASSETTE_SUFFIX}"
+            self._file = gzip.open(self.path / name, "ab")  # type: ignore
+
+        return self._file  # type: ignore
+
+    def _write(self, data: dict):
+        entry = msgpack.packb(data, use_bin_type=True)
+
+        with self._lock:
+            f = self._get_file()
+            f.write(entry)
+            f.flush()
+
+    def mark(self, name: str):
+        if self.recording:
+            self._write({"n": name, "a": time.time()})
+
+    def record(  # pylint: disable=too-many-arguments
+        self,
+        method: str,
+        url: str,
+        status: int,
+        headers,
+        body: bytes,
+        elapsed: float,
+    ):
+        self._write(
+            {
+                "m": method.upper(),
+                "u": url,
+                "s": status,
+                "h": {h: headers[h] for h in RECORDED_HEADERS if h in headers},
+                "b": body,
+                "t": elapsed,
+            }
+        )
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # Replaying
+
+    def play(self, method: str, url: str) -> dict:
+        key = (method.upper(), url)
+
+        with self._lock:
+            entries = self._entries.get(key)
+            if entries:
+                entry = entries.popleft()
+                self._last[key] = entry
+            else:
+                entry = self._last.get(key)
+
+        if entry is None:
+            raise UnrecordedRequestException(
+                f"No recorded response for {method.upper()} {url}"
+            )
+
+        return entry
+
+    def replay_delay(self, entry: dict) -> float:
+        if self.speed <= 0:
+            return 0
+        return entry["t"] / self.speed
+
+    # requests integration
+
+    def request(self, session: requests.Session, method: str, url: str, **kwargs):
+        if self.replaying:
+            entry = self.play(method, url)
+            time.sleep(self.replay_delay(entry))
+
+            return self._to_requests_response(entry, url)
+
+        start = time.monotonic()
+        response = session.request(method, url, **kwargs)
+        # reads the full body, even for streamed responses
+        body = response.content
+        self.record(
+            method,
+            url,
+            response.status_code,
+            response.headers,
+            body,
+            time.monotonic() - start,
+        )
+
+        return response
+
+    def _to_requests_response(self, entry: dict, url: str):
+        response = requests.Response()
+        response.url = url
+        response.reason = ""
+        response.status_code = entry["s"]
+        response.headers = CaseInsensitiveDict(entry["h"])
+        response._content = entry["b"]  # pylint: disable=protected-access
+        response._content_consumed = True  # pylint: disable=protected-access
+
+        return response
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport for `AsyncBoundlessClient` that records/replays through
+    a `Cassette`.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cassette: Cassette):
+        self.transport = transport
+        self.cassette = cassette
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+
+        if self.cassette.replaying:
+            entry = self.cassette.play(request.method, url)
+            await asyncio.sleep(self.cassette.replay_delay(entry))
+
+            return httpx.Response(
+                entry["s"], headers=entry["h"], content=entry["b"], request=request
+            )
+
+        start = time.monotonic()
+        response = await self.transport.handle_async_request(request)
+        body = await response.aread()
+        await asyncio.to_thread(
+            self.cassette.record,
+            request.method,
+            url,
+            response.status_code,
+            response.headers,
+            body,
+            time.monotonic() - start,
+        )
+
+        # body has already been decoded
+        headers = [
+            (k, v)
+            for k, v in response.headers.items()
+            if k.lower() not in ("content-encoding", "content-length")
+        ]
+        return httpx.Response(
+            response.status_code, headers=headers, content=body, request=request
+        )
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+_cassette: Optional[Cassette] = None
+_cassette_loaded = False
+
+
+def get_cassette() -> Optional[Cassette]:
+    """
+    Returns the active cassette. Configured by `BOUNDLESS_CASSETTE_MODE` and
+    `BOUNDLESS_CASSETTE_PATH` unless overridden with `use_cassette`.
+    """
+
+    global _cassette, _cassette_loaded  # pylint: disable=global-statement
+
+    if not _cassette_loaded:
+        _cassette_loaded = True
+        if settings.BOUNDLESS_CASSETTE_MODE:
+            _cassette = Cassette(
+                settings.BOUNDLESS_CASSETTE_PATH,
+                settings.BOUNDLESS_CASSETTE_MODE,
+                speed=settings.BOUNDLESS_CASSETTE_SPEED,
+            )
+
+    return _cassette
+
+
+@contextmanager
+def use_cassette(
+    path: Union[str, Path], mode: str, speed: float = 1.0
+) -> Iterator[Cassette]:
+    global _cassette, _cassette_loaded  # pylint: disable=global-statement
+
+    previous, previous_loaded = _cassette, _cassette_loaded
+    cassette = Cassette(path, mode, speed=speed)
+    _cassette, _cassette_loaded = cassette, True
+
+    try:
+        yield cassette
+    finally:
+        cassette.close()
+        _cassette, _cassette_loaded = previous, previous_loaded
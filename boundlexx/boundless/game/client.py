@@ -5,92 +5,114 @@ import logging
 import struct
 import subprocess  # nosec
 import time
-from collections import namedtuple
-from typing import List, Optional, Union
+from typing import Iterator, List, Optional, Union
 
 import requests
 from django.conf import settings
-from django.core.cache import cache
 from django.utils.functional import cached_property
 
+from boundlexx.boundless.game.accounts import account_pool, get_account_user
+from boundlexx.boundless.game.cassette import get_cassette
 from boundlexx.boundless.game.models import Settlement, ShopItem, World
+from boundlexx.boundless.game.pool import SessionPool, session_pool
+from boundlexx.boundless.game.ratelimit import (
+    ds_key,
+    rate_limiter,
+    world_delays,
+    world_key,
+)
+from boundlexx.boundless.game.tokens import QueryToken, query_tokens
 
 logger = logging.getLogger(__name__)
 
-QUERY_TOKEN_CACHE_KEY = "boundless_client:query_token"
-QueryToken = namedtuple("QueryToken", ("player", "token", "username"))
-
 
 PREFIXED_URLS = ["/worldpoll", "/gameserver/"]
 
-MAX_TRIES_API = 500
+MAX_TRIES_API = 50
 NON_API_DECREMENT = MAX_TRIES_API // 5
 
+SETTLEMENT_CHUNK_SIZE = 16384
+
 
 class NoCharacterException(Exception):
     pass
 
 
+def parse_world_response(response) -> Union[str, dict, bytes]:
+    response_text: Union[str, dict, bytes] = response.text
+    if "Content-Type" in response.headers:
+        if response.headers["Content-Type"] == "application/json":
+            response_text = response.json()
+        elif response.headers["Content-Type"] == "application/octet-stream":
+            response_text = response.content
+
+    return response_text
+
+
 class BoundlessClient:
     _base: str
+    _pool: SessionPool
+    _user_index: Optional[int]
 
-    def __init__(self):
+    def __init__(
+        self, pool: Optional[SessionPool] = None, user_index: Optional[int] = None
+    ):
         self._base = settings.BOUNDLESS_API_URL_BASE
+        # shared per process by default so connections outlive the client
+        self._pool = pool or session_pool
+        # index into BOUNDLESS_USERNAMES, round robin if not set
+        self._user_index = user_index
 
     # Offical API Endpoints
 
-    def _get_world(self, world: World, path, api_key=False):
+    def _get_world(self, world: World, path, api_key=False, stream=False):
         delay = settings.BOUNDLESS_API_WORLD_DELAY
         if api_key:
-            delay = delay * 2
+            delay = world_delays.get_delay(world.id)
 
-        with cache.lock(f"boundless_client:lock:world:{world.id}", expire=30):
-            cache_key = f"boundless_client:{world.id}"
-            last_call = cache.get(cache_key) or 0
-            now = time.monotonic()
+        headers = {}
+        if api_key and settings.BOUNDLESS_API_KEY:
+            headers["Boundless-API-Key"] = settings.BOUNDLESS_API_KEY
 
-            time_since = now - last_call
-            if time_since < delay:
-                time.sleep(delay - time_since)
-
-            headers = {}
-            if api_key and settings.BOUNDLESS_API_KEY:
-                headers["Boundless-API-Key"] = settings.BOUNDLESS_API_KEY
-
-            response = requests.get(
-                f"{world.api_url}{path}",
-                timeout=settings.BOUNDLESS_API_TIMEOUT,
-                headers=headers,
-            )
-            cache.set(cache_key, time.monotonic(), timeout=10)
-
-        return response
+        rate_limiter.wait(world_key(world.id), delay)
+        return self._pool.get(
+            f"{world.api_url}{path}",
+            timeout=settings.BOUNDLESS_API_TIMEOUT,
+            headers=headers,
+            stream=stream,
+        )
 
-    def _retry_world(self, path: str, world: World, api_key: bool):
+    def _retry_world(self, path: str, world: World, api_key: bool, stream=False):
         tries = MAX_TRIES_API
         while True:
-            response = self._get_world(world, path, api_key=api_key)
+            response = self._get_world(world, path, api_key=api_key, stream=stream)
 
             try:
                 response.raise_for_status()
             except requests.HTTPError as ex:
+                if stream:
+                    # body is never read, release the connection
+                    response.close()
+
                 # 403 with an API key can actually be a rate limit...
                 if api_key and ex.response.status_code == 403:
                     tries -= 1
-                    sleep = max(((MAX_TRIES_API + 1 - tries) // 10) % 20, 1) / 2
+                    # next call waits for the increased delay
+                    delay = world_delays.throttled(world.id)
                     logger.info(
-                        "403 error from API key at world: %s, %s Reties: %s, Sleep: %s",
+                        "403 error from API key at world: %s, %s Reties: %s, Delay: %s",
                         world,
                         path,
                         tries,
-                        sleep,
+                        delay,
                     )
-                    time.sleep(sleep)
                 else:
                     tries -= NON_API_DECREMENT
                 if tries <= 0:
                     raise
             else:
+                if api_key:
+                    world_delays.success(world.id)
                 break
 
         return response
@@ -103,20 +125,14 @@ class BoundlessClient:
     ) -> Union[str, dict, bytes]:
         response = self._retry_world(path, world, api_key)
 
-        response_text: Union[str, dict, bytes] = response.text
-        if "Content-Type" in response.headers:
-            if response.headers["Content-Type"] == "application/json":
-                response_text = response.json()
-            elif response.headers["Content-Type"] == "application/octet-stream":
-                response_text = response.content
-
-        return response_text
+        return parse_world_response(response)
 
     def _shop_api(
         self,
         item_id: int,
         shop_type: str,
         world: World,
+        lazy: bool = False,
     ) -> List[ShopItem]:
         response = self.call_world_api(
             f"/shopping/{shop_type}/{item_id}", world=world, api_key=True
@@ -125,54 +141,60 @@ class BoundlessClient:
         if not isinstance(response, bytes):
             return []
 
-        return ShopItem.from_binary(response)
+        return ShopItem.from_binary(response, lazy=lazy)
 
     def shop_buy(
         self,
         item_id: int,
         world: World,
+        lazy: bool = False,
     ) -> List[ShopItem]:
-        return self._shop_api(item_id, "B", world=world)
+        return self._shop_api(item_id, "B", world=world, lazy=lazy)
 
     def shop_sell(
         self,
         item_id: int,
         world: World,
+        lazy: bool = False,
     ) -> List[ShopItem]:
-        return self._shop_api(item_id, "S", world=world)
+        return self._shop_api(item_id, "S", world=world, lazy=lazy)
 
     # Undocumented/Private API Endpoints
 
     @cached_property
     def user(self):
-        with cache.lock("boundless_client:lock:user", expire=10):
-            cache_key = "boundless_client:last_user_index"
-            user_index = cache.get(cache_key)
-
-            user_count = len(settings.BOUNDLESS_USERNAMES)
-            if user_index is None:
-                user_index = 0
-            cache.set(cache_key, (user_index + 1) % user_count)
-
-        user = {"boundless": {"username": settings.BOUNDLESS_USERNAMES[user_index]}}
-        if settings.BOUNDLESS_DS_REQUIRES_AUTH:
-            user["boundless"]["password"] = settings.BOUNDLESS_PASSWORDS[user_index]
-            user["steam"] = {
-                "username": settings.STEAM_USERNAMES[user_index],
-                "password": settings.STEAM_PASSWORDS[user_index],
-            }
+        if self._user_index is None:
+            self._user_index = account_pool.next_index()
 
-        return user
+        return get_account_user(self._user_index)
 
     @cached_property
     def query_token(self) -> QueryToken:
-        cache_key = f"{QUERY_TOKEN_CACHE_KEY}:{self.user['boundless']['username']}"
+        username = self.user["boundless"]["username"]
 
-        query_token = cache.get(cache_key)
+        query_token = query_tokens.get(username)
         if query_token is not None:
+            # keep using the current token while a new one is fetched
+            if query_tokens.needs_refresh(query_token):
+                query_tokens.schedule_refresh(username)
             return query_token
 
-        if settings.BOUNDLESS_DS_REQUIRES_AUTH:
+        query_token = self.login()
+        query_tokens.set(query_token)
+
+        return query_token
+
+    def login(self) -> QueryToken:
+        """
+        Logs into the discovery server and returns a new query token. Does
+        not cache it, see `query_token`.
+        """
+
+        cassette = get_cassette()
+        replaying = cassette is not None and cassette.replaying
+
+        # no need for real credentials if the response is recorded
+        if settings.BOUNDLESS_DS_REQUIRES_AUTH and not replaying:
             data = {
                 "authToken": self._get_game_jwt(
                     self.user["boundless"]["username"],
@@ -191,7 +213,7 @@ class BoundlessClient:
         if settings.BOUNDLESS_TESTING_FEATURES:
             data.update({"gameVersion": "testing"})
 
-        response = requests.post(
+        response = self._pool.post(
             f"{self._base}/login",
             data=json.dumps(data),
             headers={"content-type": "application/json"},
@@ -204,20 +226,18 @@ class BoundlessClient:
         if "characters" not in data:
             raise NoCharacterException("No character on this universe")
 
-        query_token = QueryToken(
+        return QueryToken(
             data["characters"][0],
             data["queryToken"],
             self.user["boundless"]["username"],
+            time.time(),
         )
-        cache.set(cache_key, query_token, timeout=43200)
-
-        return query_token
 
     def invalidate_query_token(self):
-        if "query_token" in self.__dict__:
-            del self.__dict__["query_token"]
+        query_token = self.__dict__.pop("query_token", None)
 
-        cache.delete(f"{QUERY_TOKEN_CACHE_KEY}:{self.user['boundless']['username']}")
+        # a background refresh may have already replaced it
+        query_tokens.delete(self.user["boundless"]["username"], query_token)
 
     def login_user(self, username, password):
         _, response = self._get_boundless_session(username, password)
@@ -291,9 +311,7 @@ class BoundlessClient:
 
         return process.stdout.decode("utf8").strip()
 
-    def _authentiated_post(
-        self, path, poll_token=None, api_url=None, authenticate=True
-    ):
+    def auth_payload(self, path, poll_token=None):
         if poll_token:
             username = self.query_token.player["name"].lower()
             data = (
@@ -311,10 +329,17 @@ class BoundlessClient:
                     break
             headers = {"Content-Type": "application/octet-stream"}
 
+        return data, headers
+
+    def _authentiated_post(
+        self, path, poll_token=None, api_url=None, authenticate=True
+    ):
+        data, headers = self.auth_payload(path, poll_token=poll_token)
+
         if api_url is None:
             api_url = self._base
 
-        response = requests.post(
+        response = self._pool.post(
             f"{api_url}{path}",
             data=data,
             timeout=settings.BOUNDLESS_API_TIMEOUT,
@@ -335,42 +360,23 @@ class BoundlessClient:
         return response
 
     def _authenticated_ds(self, path):
-        with cache.lock("boundless_client:lock:ds", expire=30):
-            cache_key = "boundless_client:ds"
-            last_call = cache.get(cache_key) or 0
-            now = time.monotonic()
-
-            time_since = now - last_call
-            if time_since < settings.BOUNDLESS_API_DS_DELAY:
-                time.sleep(settings.BOUNDLESS_API_DS_DELAY - time_since)
+        username = self.user["boundless"]["username"]
 
-            response = self._authentiated_post(path)
-            cache.set(cache_key, time.monotonic(), timeout=10)
-
-        return response
+        rate_limiter.wait(ds_key(username), settings.BOUNDLESS_API_DS_DELAY)
+        return self._authentiated_post(path)
 
     def _authenticated_world(self, world: World, path, poll_token):
-        username = self.user["boundless"]["password"]
-        with cache.lock(
-            f"boundless_client:lock:world:{world.id}:{username}", expire=30
-        ):
-            cache_key = f"boundless_client:{world.id}:{username}"
-            last_call = cache.get(cache_key) or 0
-            now = time.monotonic()
-
-            time_since = now - last_call
-            if time_since < settings.BOUNDLESS_API_WORLD_DELAY:
-                time.sleep(settings.BOUNDLESS_API_WORLD_DELAY - time_since)
-
-            response = self._authentiated_post(
-                path,
-                poll_token=poll_token,
-                api_url=world.api_url,
-                authenticate=False,
-            )
-            cache.set(cache_key, time.monotonic(), timeout=10)
+        username = self.user["boundless"]["username"]
 
-        return response
+        rate_limiter.wait(
+            world_key(world.id, username), settings.BOUNDLESS_API_WORLD_DELAY
+        )
+        return self._authentiated_post(
+            path,
+            poll_token=poll_token,
+            api_url=world.api_url,
+            authenticate=False,
+        )
 
     def get_world_data(self, world: World):
         username = self.query_token.username
@@ -410,10 +416,31 @@ class BoundlessClient:
         response.raise_for_status()
         return response.json()["distance"]
 
-    def get_world_settlements(self, world: World):
+    def get_world_settlements(self, world: World, stream=False):
+        """
+        If `stream` is True, returns a generator that decodes settlements
+        while the response body is still downloading.
+        """
+
+        if stream:
+            return self._stream_world_settlements(world)
+
         response = self.call_world_api("/planet/16/5", world=world)
 
         if not isinstance(response, bytes):
             return []
 
         return Settlement.from_binary(response)
+
+    def _stream_world_settlements(self, world: World) -> Iterator[Settlement]:
+        response = self._retry_world("/planet/16/5", world, False, stream=True)
+
+        try:
+            if response.headers.get("Content-Type") != "application/octet-stream":
+                return
+
+            yield from Settlement.iter_binary(
+                response.iter_content(chunk_size=SETTLEMENT_CHUNK_SIZE)
+            )
+        finally:
+            response.close()
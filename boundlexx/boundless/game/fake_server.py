@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import json
+import logging
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from django.conf import settings
+
+from boundlexx.boundless.game.models import (
+    SETTLEMENT_HEADER,
+    SETTLEMENT_RECORD,
+    SHOP_HEADER,
+    SHOP_RECORD,
+)
+
+logger = logging.getLogger(__name__)
+
+REGIONS = ["use", "usw", "euc", "aus"]
+
+DS_ROUTES = [
+    ("login", re.compile(r"^/login$")),
+    ("gameserver", re.compile(r"^/gameserver/(?P<username>[^/]+)/(?P<world_id>\d+)/")),
+    (
+        "distance",
+        re.compile(r"^/distance/[^/]+/(?P<world_id>\d+)/(?P<world_id_2>\d+)/"),
+    ),
+]
+WORLD_ROUTES = [
+    ("worldpoll", re.compile(r"^/(?P<world_id>\d+)/api/worldpoll$")),
+    (
+        "shopping",
+        re.compile(
+            r"^/(?P<world_id>\d+)/api/shopping/(?P<shop_type>[BS])/(?P<item_id>\d+)$"
+        ),
+    ),
+    ("planet", re.compile(r"^/(?P<world_id>\d+)/api/planet/\d+/\d+$")),
+]
+
+
+class FakeGameServer:
+    """
+    Stand-in for the Boundless discovery server and world APIs, serving
+    synthetic (but stable for a given `seed`) data for `num_worlds` worlds.
+
+    Point `BOUNDLESS_API_URL_BASE` at `url` and every world's `apiURL` will
+    point back at this server as `{url}/{world_id}/api`.
+
+    * `latency`: seconds added to every response (plus up to 50% jitter)
+    * `rate_403`: chance of a shopping call being rate limited
+    * `rate_404`: chance of any world API call returning a 404
+    * `world_delay`: if set, shopping calls to the same world closer together
+      than this many seconds are rate limited like the live API
+    """
+
+    num_worlds: int
+    latency: float
+    rate_403: float
+    rate_404: float
+    world_delay: float
+    seed: int
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8950,
+        num_worlds: int = 100,
+        latency: float = 0.0,
+        rate_403: float = 0.0,
+        rate_404: float = 0.0,
+        world_delay: float = 0.0,
+        seed: int = 0,
+    ):
+        self.num_worlds = num_worlds
+        self.latency = latency
+        self.rate_403 = rate_403
+        self.rate_404 = rate_404
+        self.world_delay = world_delay
+        self.seed = seed
+
+        self._lock = threading.Lock()
+        self._last_shop_call: dict[int, float] = {}
+        self._random = random.Random(seed)  # nosec
+
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+
+        return thread
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):  # noqa: N802
+                server.handle(self, WORLD_ROUTES)
+
+            def do_POST(self):  # noqa: N802
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+
+                server.handle(self, DS_ROUTES + WORLD_ROUTES)
+
+            def log_message(self, fmt, *args):  # pylint: disable=arguments-renamed
+                logger.debug(fmt, *args)
+
+        return Handler
+
+    # Request handling
+
+    def _chance(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+
+        with self._lock:
+            return self._random.random() < rate
+
+    def _is_rate_limited(self, world_id: int) -> bool:
+        if self._chance(self.rate_403):
+            return True
+
+        if self.world_delay <= 0:
+            return False
+
+        now = time.monotonic()
+        with self._lock:
+            last_call = self._last_shop_call.get(world_id, 0)
+            if now - last_call < self.world_delay:
+                return True
+            self._last_shop_call[world_id] = now
+
+        return False
+
+    def handle(self, request: BaseHTTPRequestHandler, routes):
+        if self.latency > 0:
+            time.sleep(self.latency * (1 + self._random.random() / 2))
+
+        for name, pattern in routes:
+            match = pattern.match(request.path)
+            if match is None:
+                continue
+
+            kwargs = match.groupdict()
+            world_id = int(kwargs.get("world_id", 0))
+
+            if name not in ("login", "distance"):
+                if not self.is_world(world_id) or (
+                    name in ("worldpoll", "shopping", "planet")
+                    and self._chance(self.rate_404)
+                ):
+                    self._respond(request, 404)
+                    return
+
+            if name == "shopping" and self._is_rate_limited(world_id):
+                self._respond(request, 403)
+                return
+
+            status, content_type, body = getattr(self, f"_{name}")(**kwargs)
+            self._respond(request, status, content_type, body)
+            return
+
+        self._respond(request, 404)
+
+    def _respond(
+        self,
+        request: BaseHTTPRequestHandler,
+        status: int,
+        content_type: Optional[str] = None,
+        body: bytes = b"",
+    ):
+        request.send_response(status)
+        if content_type is not None:
+            request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def _json(self, data):
+        return 200, "application/json", json.dumps(data).encode("utf8")
+
+    def _world_random(self, world_id: int, *extra) -> random.Random:
+        return random.Random(  # nosec
+            "-".join(str(i) for i in (self.seed, world_id) + extra)
+        )
+
+    def is_world(self, world_id: int) -> bool:
+        return 0 < world_id <= self.num_worlds
+
+    # Discovery server
+
+    def _login(self):
+        return self._json(
+            {
+                "characters": [{"id": 1, "name": "fake"}],
+                "queryToken": f"fake-token-{time.time()}",
+            }
+        )
+
+    def _gameserver(self, world_id, **kwargs):
+        world_id = int(world_id)
+        world_random = self._world_random(world_id)
+
+        world_data = {
+            "id": world_id,
+            "name": f"fake{world_id}",
+            "displayName": f"Fake World {world_id}",
+            "region": world_random.choice(REGIONS),
+            "tier": world_random.randint(0, 7),
+            "worldSize": world_random.choice([192, 288, 384]),
+            "worldType": world_random.randint(1, 12),
+            "timeOffset": 0,
+            "atmosphereColor": [world_random.random() for _ in range(3)],
+            "waterColor": [world_random.random() for _ in range(3)],
+            "addr": f"fake{world_id}.local",
+            "ipAddr": "127.0.0.1",
+            "apiURL": f"{self.url}/{world_id}/api",
+            "websocketURL": f"ws://fake{world_id}.local",
+            "numRegions": 1,
+            "info": {"players": world_random.randint(0, 50)},
+        }
+
+        return self._json({"worldData": world_data, "pollData": f"poll-{world_id}"})
+
+    def _distance(self, world_id, world_id_2):
+        return self._json({"distance": abs(int(world_id) - int(world_id_2)) * 10.0})
+
+    # World APIs
+
+    def _worldpoll(self, world_id):
+        world_random = self._world_random(int(world_id), int(time.time() // 60))
+
+        leaderboard = []
+        for rank in range(world_random.randint(0, 10)):
+            leaderboard.append(
+                {
+                    "mayor": {
+                        "id": world_random.randint(1, 100000),
+                        "name": f"Mayor {rank}",
+                        "type": 0,
+                        "guildTag": "",
+                    },
+                    "name": f"Settlement {rank}",
+                    "prestige": world_random.randint(1, 100000),
+                }
+            )
+
+        return self._json(
+            {
+                "beacons": world_random.randint(0, 1000),
+                "plots": world_random.randint(0, 100000),
+                "prestige": world_random.randint(0, 10000000),
+                "resources": [
+                    world_random.randint(0, 100000)
+                    for _ in settings.BOUNDLESS_WORLD_POLL_RESOURCE_MAPPING
+                ],
+                "leaderboard": leaderboard,
+            }
+        )
+
+    def _shopping(self, world_id, shop_type, item_id):
+        # prices slowly change over time so the pollers have something to do
+        world_random = self._world_random(
+            int(world_id), shop_type, int(item_id), int(time.time() // 300)
+        )
+
+        body = b""
+        for index in range(world_random.randint(0, 20)):
+            name = f"Shop {index}".encode("latin1")
+            guild_tag = b"FAKE"
+            body += (
+                SHOP_HEADER.pack(len(name), len(guild_tag))
+                + name
+                + guild_tag
+                + SHOP_RECORD.pack(
+                    world_random.randint(1, 1000),
+                    world_random.randint(0, 3),
+                    world_random.randint(1, 100000),
+                    world_random.randint(-1000, 1000),
+                    world_random.randint(-1000, 1000),
+                    world_random.randint(0, 255),
+                )
+            )
+
+        return 200, "application/octet-stream", body
+
+    def _planet(self, world_id):
+        world_random = self._world_random(int(world_id), "planet")
+
+        count = world_random.randint(0, 200)
+        body = SETTLEMENT_HEADER.pack(b"", count)
+        for index in range(count):
+            name = f"Settlement {index}".encode("latin1")
+            body += (
+                bytes([len(name)])
+                + name
+                + SETTLEMENT_RECORD.pack(
+                    world_random.randint(0, 100000),
+                    0,
+                    world_random.randint(-100, 100),
+                    world_random.randint(-100, 100),
+                )
+            )
+
+        return 200, "application/octet-stream", b"\x00" * 5 + zlib.compress(body)
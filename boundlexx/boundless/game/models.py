@@ -5,9 +5,10 @@ import zlib
 from collections import namedtuple
 from dataclasses import dataclass
 from http.client import RemoteDisconnected
-from struct import unpack_from
-from typing import Union
+from struct import Struct
+from typing import Iterable, Iterator, Optional, Union
 
+import httpx
 from requests.exceptions import ConnectionError as RequestsConnectionError
 from requests.exceptions import RequestException
 from urllib3.exceptions import (
@@ -24,6 +25,7 @@ HTTP_ERRORS = (
     NewConnectionError,
     ProtocolError,
     RemoteDisconnected,
+    httpx.HTTPError,
     RequestException,
     RequestsConnectionError,
     socket.error,
@@ -33,6 +35,18 @@ HTTP_ERRORS = (
 
 World = namedtuple("World", ("id", "api_url"))
 
+# Read more below:
+# https://docs.playboundless.com/modding/http-shopping.html
+SHOP_HEADER = Struct("<BB")
+SHOP_RECORD = Struct("<IIqhhB")
+
+# planet responses are a 5 byte prefix and then zlib data
+SETTLEMENT_PREFIX_SIZE = 5
+SETTLEMENT_HEADER = Struct("<8sI")
+SETTLEMENT_RECORD = Struct("<IIhh")
+# max bytes to decompress at a time
+SETTLEMENT_WINDOW_SIZE = 65536
+
 
 @dataclass
 class Location:
@@ -56,49 +70,177 @@ class ShopItem:
     location: Location
 
     @staticmethod
-    def from_binary(binary: bytes) -> list[ShopItem]:
-        items = []
+    def from_binary(binary: bytes, lazy: bool = False) -> list:
+        """
+        Decodes a shopping API response. If `lazy` is True, the returned
+        items are `ShopRecord`s instead of `ShopItem`s.
+        """
+
+        if lazy:
+            return list(iter_shop_records(binary))
+
+        buffer = memoryview(binary)
+        header_size = SHOP_HEADER.size
+        record_size = SHOP_RECORD.size
+        header_unpack = SHOP_HEADER.unpack_from
+        record_unpack = SHOP_RECORD.unpack_from
 
+        items = []
         offset = 0
-        while offset != len(binary):
-            # Read more below:
-            # https://docs.playboundless.com/modding/http-shopping.html
+        total = len(buffer)
+        while offset < total:
+            beacon_name_length, guild_tag_length = header_unpack(buffer, offset)
+            name_start = offset + header_size
+            name_end = name_start + beacon_name_length
+            tag_end = name_end + guild_tag_length
 
-            beacon_name_length, guild_tag_length = unpack_from("<BB", binary, offset)
             (
-                beacon_name,
-                guild_tag,
                 item_count,
                 shop_activity,
                 price,
                 location_x,
                 location_z,
                 location_y,
-            ) = unpack_from(
-                f"<{beacon_name_length}s{guild_tag_length}sIIqhhB",
-                binary,
-                offset + 2,
-            )
-            offset += 23 + beacon_name_length + guild_tag_length
+            ) = record_unpack(buffer, tag_end)
 
-            beacon_name = beacon_name.decode("latin1")
-            guild_tag = guild_tag.decode("latin1")
-
-            location = Location(location_x, location_y, -location_z)
             items.append(
                 ShopItem(
-                    beacon_name,
-                    guild_tag,
+                    str(buffer[name_start:name_end], "latin1"),
+                    str(buffer[name_end:tag_end], "latin1"),
                     item_count,
                     shop_activity,
                     price / 100,
-                    location,
+                    Location(location_x, location_y, -location_z),
                 )
             )
+            offset = tag_end + record_size
 
         return items
 
 
+class ShopRecord:
+    """
+    Lightweight read only view of a single shop in a shopping API response.
+
+    Has the same attributes as `ShopItem`, but names are only decoded and
+    `Location` is only created on access.
+    """
+
+    __slots__ = (
+        "_buffer",
+        "_name_start",
+        "_name_end",
+        "_tag_end",
+        "_location",
+        "item_count",
+        "shop_activity",
+        "raw_price",
+        "location_x",
+        "location_y",
+        "location_z",
+    )
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        buffer: memoryview,
+        name_start: int,
+        name_end: int,
+        tag_end: int,
+        item_count: int,
+        shop_activity: int,
+        raw_price: int,
+        location_x: int,
+        location_y: int,
+        location_z: int,
+    ):
+        self._buffer = buffer
+        self._name_start = name_start
+        self._name_end = name_end
+        self._tag_end = tag_end
+        self._location: Optional[Location] = None
+        self.item_count = item_count
+        self.shop_activity = shop_activity
+        self.raw_price = raw_price
+        self.location_x = location_x
+        self.location_y = location_y
+        self.location_z = location_z
+
+    def __repr__(self):
+        return (
+            f"<ShopRecord beacon_name={self.beacon_name!r} "
+            f"price={self.price} location={self.location}>"
+        )
+
+    @property
+    def beacon_name(self) -> str:
+        start, end = self._name_start, self._name_end
+        return str(self._buffer[start:end], "latin1")
+
+    @property
+    def guild_tag(self) -> str:
+        start, end = self._name_end, self._tag_end
+        return str(self._buffer[start:end], "latin1")
+
+    @property
+    def price(self) -> float:
+        return self.raw_price / 100
+
+    @property
+    def location(self) -> Location:
+        if self._location is None:
+            self._location = Location(self.location_x, self.location_y, self.location_z)
+        return self._location
+
+    def to_shop_item(self) -> ShopItem:
+        return ShopItem(
+            self.beacon_name,
+            self.guild_tag,
+            self.item_count,
+            self.shop_activity,
+            self.price,
+            self.location,
+        )
+
+
+def iter_shop_records(binary: bytes) -> Iterator[ShopRecord]:
+    buffer = memoryview(binary)
+    header_size = SHOP_HEADER.size
+    record_size = SHOP_RECORD.size
+    header_unpack = SHOP_HEADER.unpack_from
+    record_unpack = SHOP_RECORD.unpack_from
+
+    offset = 0
+    total = len(buffer)
+    while offset < total:
+        beacon_name_length, guild_tag_length = header_unpack(buffer, offset)
+        name_start = offset + header_size
+        name_end = name_start + beacon_name_length
+        tag_end = name_end + guild_tag_length
+
+        (
+            item_count,
+            shop_activity,
+            price,
+            location_x,
+            location_z,
+            location_y,
+        ) = record_unpack(buffer, tag_end)
+        offset = tag_end + record_size
+
+        yield ShopRecord(
+            buffer,
+            name_start,
+            name_end,
+            tag_end,
+            item_count,
+            shop_activity,
+            price,
+            location_x,
+            location_y,
+            -location_z,
+        )
+
+
 @dataclass
 class Settlement:
     name: str
@@ -107,28 +249,72 @@ class Settlement:
 
     @staticmethod
     def from_binary(binary: bytes) -> list[Settlement]:
-        binary = zlib.decompress(binary[5:])
+        return list(Settlement.iter_binary([binary]))
 
-        offset = 8
+    @staticmethod
+    def iter_binary(chunks: Iterable[bytes]) -> Iterator[Settlement]:
+        """
+        Incrementally decompresses and decodes a `/planet/{x}/{y}` response.
+        Settlements are yielded as soon as their bytes have been received, so
+        only a small window of the decompressed payload is held in memory.
+        """
 
-        count = unpack_from("<I", binary, offset)[0]
-        offset += 4
+        buffer = bytearray()
+        count: Optional[int] = None
+        total = 0
 
-        settlements: list[Settlement] = []
+        for data in _iter_decompressed(chunks, SETTLEMENT_PREFIX_SIZE):
+            buffer.extend(data)
+            offset = 0
 
-        while len(settlements) < count and offset < len(binary):
-            name_length = unpack_from("<B", binary, offset)[0]
-            offset += 1
+            if count is None:
+                if len(buffer) < SETTLEMENT_HEADER.size:
+                    continue
+                count = SETTLEMENT_HEADER.unpack_from(buffer, 0)[1]
+                offset = SETTLEMENT_HEADER.size
 
-            name, prestige, _, x, z = unpack_from(
-                f"<{name_length}sIIhh", binary, offset
-            )
-            offset += name_length + 12
+            while total < count and offset < len(buffer):
+                name_start = offset + 1
+                name_end = name_start + buffer[offset]
+                if name_end + SETTLEMENT_RECORD.size > len(buffer):
+                    break
 
-            settlements.append(
-                Settlement(
-                    name.decode("latin1"), prestige, Location(x * 16, None, -z * 16)
-                )
+                prestige, _, x, z = SETTLEMENT_RECORD.unpack_from(buffer, name_end)
+                name = buffer[name_start:name_end].decode("latin1")
+                offset = name_end + SETTLEMENT_RECORD.size
+                total += 1
+
+                yield Settlement(name, prestige, Location(x * 16, None, -z * 16))
+
+            # drop everything that has already been decoded, the rest of the
+            # stream is still read so a cut off download is detected
+            if total >= count:
+                buffer.clear()
+            else:
+                del buffer[:offset]
+
+        # a cut off download must not be treated as the full settlement list
+        if count is None or total < count:
+            raise ValueError(
+                f"Settlement response truncated: got {total} of {count} settlements"
             )
 
-        return settlements
+
+def _iter_decompressed(chunks: Iterable[bytes], skip: int) -> Iterator[bytes]:
+    decompressor = zlib.decompressobj()
+
+    for chunk in chunks:
+        if skip > 0:
+            skipped = min(skip, len(chunk))
+            chunk = chunk[skipped:]
+            skip -= skipped
+
+        while chunk:
+            yield decompressor.decompress(chunk, SETTLEMENT_WINDOW_SIZE)
+            chunk = decompressor.unconsumed_tail
+
+    yield decompressor.flush()
+
+    # `decompressobj` does not raise on an incomplete stream like `decompress`
+    if not decompressor.eof:
+        raise zlib.error("incomplete or truncated stream")
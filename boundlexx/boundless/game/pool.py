@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from boundlexx.boundless.game.cassette import get_cassette
+from boundlexx.boundless.metrics import (
+    HTTP_POOL_EVICTIONS,
+    HTTP_POOL_HITS,
+    HTTP_POOL_MISSES,
+)
+
+
+class _CountingMixin:
+    num_connections: int
+    host: str
+
+    def _get_conn(self, timeout=None):
+        before = self.num_connections
+        conn = super()._get_conn(timeout=timeout)  # type: ignore
+
+        # `num_connections` only goes up if `_new_conn` had to be called
+        if self.num_connections == before:
+            HTTP_POOL_HITS.labels(host=self.host).inc()
+        else:
+            HTTP_POOL_MISSES.labels(host=self.host).inc()
+
+        return conn
+
+
+class CountingHTTPConnectionPool(_CountingMixin, HTTPConnectionPool):
+    pass
+
+
+class CountingHTTPSConnectionPool(_CountingMixin, HTTPSConnectionPool):
+    pass
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+
+class SessionPool:
+    """
+    Keep alive `requests.Session` per host for the Boundless API.
+
+    Every world is its own host, so each host gets its own session with a
+    small bounded connection pool. Sessions that have not been used for
+    `idle_timeout` seconds are closed, and if more then `max_hosts` sessions
+    are open the least recently used one is closed.
+    """
+
+    max_hosts: int
+    max_connections: int
+    idle_timeout: float
+
+    def __init__(
+        self,
+        max_hosts: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+    ):
+        if max_hosts is None:
+            max_hosts = settings.BOUNDLESS_API_POOL_MAX_HOSTS
+        if max_connections is None:
+            max_connections = settings.BOUNDLESS_API_POOL_MAX_CONNECTIONS
+        if idle_timeout is None:
+            idle_timeout = settings.BOUNDLESS_API_POOL_IDLE_TIMEOUT
+
+        self.max_hosts = max_hosts
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+
+        self._lock = threading.Lock()
+        self._sessions: OrderedDict[str, tuple[requests.Session, float]] = OrderedDict()
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = CountingHTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.max_connections,
+            pool_block=False,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        return session
+
+    def _evict(self, now: float) -> list[requests.Session]:
+        evicted = []
+
+        for host, (session, last_used) in list(self._sessions.items()):
+            if now - last_used < self.idle_timeout:
+                # ordered by last use, everything after is newer
+                break
+
+            del self._sessions[host]
+            evicted.append(session)
+
+        while len(self._sessions) > self.max_hosts:
+            _, (session, _) = self._sessions.popitem(last=False)
+            evicted.append(session)
+
+        return evicted
+
+    def get_session(self, url: str) -> requests.Session:
+        host = urlsplit(url).netloc
+        now = time.monotonic()
+
+        with self._lock:
+            session, _ = self._sessions.pop(host, (None, None))
+            if session is None:
+                session = self._create_session()
+
+            self._sessions[host] = (session, now)
+            evicted = self._evict(now)
+
+        for old_session in evicted:
+            HTTP_POOL_EVICTIONS.inc()
+            old_session.close()
+
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        session = self.get_session(url)
+
+        cassette = get_cassette()
+        if cassette is not None:
+            return cassette.request(session, method, url, **kwargs)
+
+        return session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            sessions = [s for s, _ in self._sessions.values()]
+            self._sessions.clear()
+
+        for session in sessions:
+            session.close()
+
+
+session_pool = SessionPool()
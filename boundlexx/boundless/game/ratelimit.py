@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+RATE_LIMIT_PREFIX = "boundless_client:ratelimit"
+WORLD_DELAY_PREFIX = "boundless_client:world_delay"
+WORLD_DELAY_TIMEOUT = 86400
+
+# Token bucket implemented as GCRA (generic cell rate algorithm). The key holds
+# the "theoretical arrival time" (TAT) of the next request in milliseconds of
+# Redis server time, so every worker on every host paces against the same
+# clock. Each call atomically reserves the next free slot and returns how many
+# milliseconds the caller has to wait for it. Nothing is held while the caller
+# waits or does its request.
+#
+# The interval the TAT was computed with is stored next to it (`tat:interval`)
+# so if the interval is widened (world delay after a 403) the next slot is
+# pushed out by the difference instead of still using the old interval.
+#
+# KEYS[1] - bucket key
+# ARGV[1] - interval between requests (ms)
+# ARGV[2] - burst size (bucket capacity)
+RESERVE_SCRIPT = """
+-- required before writing after TIME on Redis < 5, no-op/removed afterwards
+if redis.replicate_commands then
+    redis.replicate_commands()
+end
+
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local tat = nil
+local state = redis.call("GET", KEYS[1])
+if state then
+    local stored_tat, stored_interval = string.match(state, "^(%d+):?(%d*)$")
+    tat = tonumber(stored_tat)
+    stored_interval = tonumber(stored_interval)
+
+    if tat ~= nil and stored_interval ~= nil and interval > stored_interval then
+        tat = tat + interval - stored_interval
+    end
+end
+
+if tat == nil or tat < now then
+    tat = now
+end
+
+local slot = math.max(now, tat - (burst - 1) * interval)
+local new_tat = tat + interval
+
+redis.call(
+    "SET", KEYS[1], new_tat .. ":" .. interval, "PX", new_tat - now + interval
+)
+
+return slot - now
+"""
+
+
+def world_key(world_id: int, username: Optional[str] = None) -> str:
+    if username is None:
+        return f"world:{world_id}"
+    return f"world:{world_id}:{username}"
+
+
+def ds_key(username: str) -> str:
+    return f"ds:{username}"
+
+
+class _LocalBuckets:
+    """
+    Process local fallback for cache backends without a Redis client (tests,
+    local memory cache).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tats: dict[str, tuple[float, float]] = {}
+
+    def reserve(self, key: str, interval: float, burst: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            tat, last_interval = self._tats.get(key, (now, interval))
+            if interval > last_interval:
+                tat += interval - last_interval
+            tat = max(tat, now)
+
+            slot = max(now, tat - (burst - 1) * interval)
+            self._tats[key] = (tat + interval, interval)
+
+        return slot - now
+
+
+class RateLimiter:
+    """
+    Distributed token bucket limiter shared by all Boundless API clients.
+
+    `reserve` atomically claims the next slot for `key` and returns the
+    number of seconds to wait before using it.
+    """
+
+    prefix: str
+
+    def __init__(self, prefix: str = RATE_LIMIT_PREFIX):
+        self.prefix = prefix
+        self._script = None
+        self._local: Optional[_LocalBuckets] = None
+
+    def _get_script(self):
+        if self._script is None and self._local is None:
+            try:
+                client = cache.client.get_client()  # type: ignore
+            except AttributeError:
+                self._local = _LocalBuckets()
+            else:
+                self._script = client.register_script(RESERVE_SCRIPT)
+
+        return self._script
+
+    def reserve(self, key: str, interval: float, burst: int = 1) -> float:
+        script = self._get_script()
+
+        if script is None:
+            return self._local.reserve(key, interval, burst)  # type: ignore
+
+        wait = script(
+            keys=[f"{self.prefix}:{key}"],
+            args=[max(int(interval * 1000), 1), max(burst, 1)],
+        )
+
+        return int(wait) / 1000
+
+    def wait(self, key: str, interval: float, burst: int = 1):
+        wait = self.reserve(key, interval, burst=burst)
+
+        if wait > 0:
+            time.sleep(wait)
+
+    async def async_wait(self, key: str, interval: float, burst: int = 1):
+        # reserving is a Redis call, keep it off of the event loop
+        wait = await asyncio.to_thread(self.reserve, key, interval, burst=burst)
+
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class WorldDelayController:
+    """
+    AIMD (additive increase, multiplicative decrease) controller for the
+    rate of API key calls to a world.
+
+    Every 403 (rate limit) multiplies the world's delay by
+    `BOUNDLESS_API_WORLD_DELAY_INCREASE`, every success takes
+    `BOUNDLESS_API_WORLD_DELAY_DECREASE` seconds off of it. The delay is
+    bounded by `min_delay` and `BOUNDLESS_API_WORLD_DELAY_MAX`.
+
+    Learned delays and success/403 counts are stored in the cache so they are
+    shared between workers. They expire after a day without calls.
+    """
+
+    prefix: str
+
+    def __init__(self, prefix: str = WORLD_DELAY_PREFIX):
+        self.prefix = prefix
+
+    @property
+    def min_delay(self) -> float:
+        # API key calls have always used double the normal world delay
+        return settings.BOUNDLESS_API_WORLD_DELAY * 2
+
+    def _key(self, world_id: int, name: str) -> str:
+        return f"{self.prefix}:{world_id}:{name}"
+
+    def _incr(self, key: str):
+        cache.add(key, 0, timeout=WORLD_DELAY_TIMEOUT)
+        try:
+            cache.incr(key)
+        except ValueError:  # expired between add and incr
+            cache.set(key, 1, timeout=WORLD_DELAY_TIMEOUT)
+
+    def get_delay(self, world_id: int) -> float:
+        delay = cache.get(self._key(world_id, "delay"))
+
+        if delay is None:
+            return self.min_delay
+        return max(delay, self.min_delay)
+
+    def _set_delay(self, world_id: int, delay: float):
+        delay = min(max(delay, self.min_delay), settings.BOUNDLESS_API_WORLD_DELAY_MAX)
+        cache.set(self._key(world_id, "delay"), delay, timeout=WORLD_DELAY_TIMEOUT)
+
+        return delay
+
+    def success(self, world_id: int) -> float:
+        self._incr(self._key(world_id, "success"))
+
+        return self._set_delay(
+            world_id,
+            self.get_delay(world_id) - settings.BOUNDLESS_API_WORLD_DELAY_DECREASE,
+        )
+
+    def throttled(self, world_id: int) -> float:
+        self._incr(self._key(world_id, "throttled"))
+
+        return self._set_delay(
+            world_id,
+            self.get_delay(world_id) * settings.BOUNDLESS_API_WORLD_DELAY_INCREASE,
+        )
+
+    def get_stats(self, world_ids: list[int]) -> dict[int, dict]:
+        keys = []
+        for world_id in world_ids:
+            keys += [self._key(world_id, n) for n in ("delay", "success", "throttled")]
+        values = cache.get_many(keys)
+
+        stats = {}
+        for world_id in world_ids:
+            success = values.get(self._key(world_id, "success"), 0)
+            throttled = values.get(self._key(world_id, "throttled"), 0)
+            total = success + throttled
+
+            stats[world_id] = {
+                "delay": max(
+                    values.get(self._key(world_id, "delay"), self.min_delay),
+                    self.min_delay,
+                ),
+                "success": success,
+                "throttled": throttled,
+                "throttle_ratio": throttled / total if total > 0 else 0.0,
+            }
+
+        return stats
+
+    def reset(self, world_id: int):
+        cache.delete_many(
+            [self._key(world_id, n) for n in ("delay", "success", "throttled")]
+        )
+
+
+rate_limiter = RateLimiter()
+world_delays = WorldDelayController()
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import time
+from collections import namedtuple
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+# cache key names, not credentials
+QUERY_TOKEN_CACHE_KEY = "boundless_client:query_token"  # nosec
+QUERY_TOKEN_REFRESH_KEY = "boundless_client:query_token_refresh"  # nosec
+
+# `issued` is a unix timestamp, tokens cached before it was added have None
+QueryToken = namedtuple(
+    "QueryToken", ("player", "token", "username", "issued"), defaults=(None,)
+)
+
+
+class QueryTokenStore:
+    """
+    Cached query tokens per account.
+
+    Tokens are refreshed in the background (`refresh_query_tokens` task) once
+    they are within `BOUNDLESS_QUERY_TOKEN_REFRESH_AHEAD` seconds of
+    `BOUNDLESS_QUERY_TOKEN_LIFETIME`. The current token keeps being handed
+    out until the new one replaces it, so callers never wait on a login
+    unless there is no token at all.
+    """
+
+    def _key(self, username: str) -> str:
+        return f"{QUERY_TOKEN_CACHE_KEY}:{username}"
+
+    def get(self, username: str) -> Optional[QueryToken]:
+        return cache.get(self._key(username))
+
+    def set(self, query_token: QueryToken):  # noqa: A003
+        cache.set(
+            self._key(query_token.username),
+            query_token,
+            timeout=settings.BOUNDLESS_QUERY_TOKEN_LIFETIME,
+        )
+
+    def delete(self, username: str, query_token: Optional[QueryToken] = None):
+        """
+        Deletes the token for `username`. If `query_token` is passed, only
+        deletes it if it is still the current token (it may have already been
+        rotated by a refresh).
+        """
+
+        if query_token is not None:
+            current = self.get(username)
+            if current is not None and current.token != query_token.token:
+                return
+
+        cache.delete(self._key(username))
+
+    def needs_refresh(self, query_token: QueryToken) -> bool:
+        if query_token.issued is None:
+            return True
+
+        age = time.time() - query_token.issued
+        return age > (
+            settings.BOUNDLESS_QUERY_TOKEN_LIFETIME
+            - settings.BOUNDLESS_QUERY_TOKEN_REFRESH_AHEAD
+        )
+
+    def schedule_refresh(self, username: str):
+        # only queue one refresh per account at a time
+        if not cache.add(f"{QUERY_TOKEN_REFRESH_KEY}:{username}", True, timeout=300):
+            return
+
+        from boundlexx.boundless.tasks.tokens import (  # pylint: disable=cyclic-import  # noqa: E501
+            refresh_query_tokens,
+        )
+
+        refresh_query_tokens.delay([username])
+
+    def refresh_done(self, username: str):
+        cache.delete(f"{QUERY_TOKEN_REFRESH_KEY}:{username}")
+
+
+query_tokens = QueryTokenStore()
@@ -1,10 +1,10 @@
 import djclick as click
 
-from boundlexx.boundless.models import BeaconScan, Color, Settlement, World
-from boundlexx.boundless.utils import calculate_extra_names, html_name
+from boundlexx.boundless.models import BeaconScan, Settlement, World
+from boundlexx.boundless.utils import calculate_extra_names, get_names
 
 
-def _beacons(force, colors):
+def _beacons(force):
     click.echo("Doing Beacon Scans...")
     if force:
         BeaconScan.objects.all().update(text_name=None, html_name=None)
@@ -15,12 +15,11 @@ def _beacons(force, colors):
     ) as pbar:
         for beacon in pbar:
             if beacon.name is not None and beacon.text_name is None:
-                beacon.text_name = html_name(beacon.name, strip=True, colors=colors)
-                beacon.html_name = html_name(beacon.name, colors=colors)
+                beacon.text_name, beacon.html_name = get_names(beacon.name)
                 beacon.save()
 
 
-def _worlds(force, colors):
+def _worlds(force):
     click.echo("Doing Worlds...")
     if force:
         World.objects.all().update(text_name=None, html_name=None, sort_name=None)
@@ -30,11 +29,11 @@ def _worlds(force, colors):
         worlds.iterator(), length=worlds.count(), show_percent=True, show_pos=True
     ) as pbar:
         for world in pbar:
-            world = calculate_extra_names(world, world.display_name, colors=colors)
+            world = calculate_extra_names(world, world.display_name)
             world.save()
 
 
-def _settlements(force, colors):
+def _settlements(force):
     click.echo("Doing Settlements...")
     if force:
         Settlement.objects.all().update(text_name=None, html_name=None)
@@ -48,10 +47,7 @@ def _settlements(force, colors):
     ) as pbar:
         for settlement in pbar:
             if settlement.name is not None and settlement.text_name is None:
-                settlement.text_name = html_name(
-                    settlement.name, strip=True, colors=colors
-                )
-                settlement.html_name = html_name(settlement.name, colors=colors)
+                settlement.text_name, settlement.html_name = get_names(settlement.name)
                 settlement.save()
 
 
@@ -104,13 +100,11 @@ def command(  # pylint: disable=too-many-arguments
         enable_leaderboards = True
         enable_settlements = True
 
-    colors = Color.objects.all()
-
     if enable_worlds:
-        _worlds(force, colors)
+        _worlds(force)
 
     if enable_settlements:
-        _settlements(force, colors)
+        _settlements(force)
 
     if enable_beacons:
-        _beacons(force, colors)
+        _beacons(force)
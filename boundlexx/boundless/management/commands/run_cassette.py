@@ -0,0 +1,130 @@
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+from typing import Optional
+from unittest import mock
+
+import djclick as click
+from django.conf import settings
+from django.utils import timezone
+
+from boundlexx.boundless.game.cassette import MODE_RECORD, MODE_REPLAY, use_cassette
+from boundlexx.boundless.tasks import (
+    poll_settlements,
+    poll_worlds,
+    poll_worlds_split,
+    update_prices,
+    update_prices_split,
+)
+
+TASKS = {
+    "update_prices": update_prices,
+    "poll_worlds": poll_worlds,
+    "poll_settlements": poll_settlements,
+}
+
+# normally queued for other workers, run in process so they use the cassette
+SPLIT_TASKS = [update_prices_split, poll_worlds_split]
+
+
+# modules that decide which worlds and items are due when a task runs
+CLOCK_MODULES = [
+    "boundlexx.boundless.tasks.shop",
+    "boundlexx.boundless.tasks.worlds",
+]
+
+
+class ShiftedTimezone:
+    """
+    Stand in for `django.utils.timezone` with `now` shifted back by `offset`.
+    """
+
+    def __init__(self, offset: timedelta):
+        self.offset = offset
+
+    def now(self):
+        return timezone.now() - self.offset
+
+    def __getattr__(self, name):
+        return getattr(timezone, name)
+
+
+@contextmanager
+def run_inline(tasks):
+    with ExitStack() as stack:
+        for task in tasks:
+            stack.enter_context(mock.patch.object(task, "delay", task))
+
+        yield
+
+
+@contextmanager
+def shift_now(recorded: Optional[float]):
+    """
+    Shifts the clock of the poll tasks back to when `recorded` was, so the
+    same worlds and items are due as when recording. Only `CLOCK_MODULES` are
+    shifted, everything else (`auto_now` fields, etc.) keeps the real time.
+    """
+
+    if recorded is None:
+        yield
+        return
+
+    shifted = ShiftedTimezone(timedelta(seconds=time.time() - recorded))
+    with ExitStack() as stack:
+        for module in CLOCK_MODULES:
+            stack.enter_context(mock.patch(f"{module}.timezone", shifted))
+
+        yield
+
+
+@click.command()
+@click.argument("mode", type=click.Choice([MODE_RECORD, MODE_REPLAY]))
+@click.option(
+    "-p",
+    "--path",
+    default=None,
+    help="Cassette directory (default BOUNDLESS_CASSETTE_PATH)",
+)
+@click.option(
+    "-s",
+    "--speed",
+    type=float,
+    default=1.0,
+    help="Replay speed multiplier, 0 for no delay",
+)
+@click.option(
+    "-t",
+    "--task",
+    "tasks",
+    type=click.Choice(list(TASKS.keys())),
+    multiple=True,
+    help="Tasks to run (default all)",
+)
+def command(mode, path, speed, tasks):
+    """
+    Runs the pollers in process while recording all Boundless API responses,
+    or replays a previous recording as a benchmark.
+
+    Replays are only comparable when run against the same database as the
+    recording (restore a snapshot taken before recording).
+    """
+
+    if path is None:
+        path = settings.BOUNDLESS_CASSETTE_PATH
+    if not tasks:
+        tasks = list(TASKS.keys())
+
+    with use_cassette(path, mode, speed=speed) as cassette, run_inline(SPLIT_TASKS):
+        for name in tasks:
+            click.echo(f"Running {name} ({mode})...")
+
+            cassette.mark(name)
+            recorded = cassette.marks.get(name)
+            if cassette.replaying and recorded is None:
+                click.secho(f"No recorded start time for {name}", fg="yellow")
+
+            with shift_now(recorded):
+                start = time.monotonic()
+                TASKS[name]()
+                click.echo(f"{name} took {time.monotonic() - start:.2f}s")
@@ -0,0 +1,55 @@
+import djclick as click
+
+from boundlexx.boundless.game.fake_server import FakeGameServer
+
+
+@click.command()
+@click.option("-h", "--host", default="127.0.0.1", help="Host to bind to")
+@click.option("-p", "--port", type=int, default=8950, help="Port to bind to")
+@click.option("-w", "--worlds", type=int, default=100, help="Number of worlds")
+@click.option(
+    "-l", "--latency", type=float, default=0.0, help="Seconds added to responses"
+)
+@click.option(
+    "--rate-403",
+    type=float,
+    default=0.0,
+    help="Chance (0-1) of a shopping call being rate limited",
+)
+@click.option(
+    "--rate-404",
+    type=float,
+    default=0.0,
+    help="Chance (0-1) of a world API call returning a 404",
+)
+@click.option(
+    "-d",
+    "--world-delay",
+    type=float,
+    default=0.0,
+    help="Rate limit shopping calls to a world closer together than this",
+)
+@click.option("-s", "--seed", type=int, default=0, help="Seed for world data")
+def command(  # pylint: disable=too-many-arguments
+    host, port, worlds, latency, rate_403, rate_404, world_delay, seed
+):
+    server = FakeGameServer(
+        host=host,
+        port=port,
+        num_worlds=worlds,
+        latency=latency,
+        rate_403=rate_403,
+        rate_404=rate_404,
+        world_delay=world_delay,
+        seed=seed,
+    )
+
+    click.echo(f"Serving {worlds} fake worlds at {server.url}")
+    click.echo(f"Set BOUNDLESS_API_URL_BASE={server.url} to use it")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
@@ -0,0 +1,48 @@
+import djclick as click
+
+from boundlexx.boundless.game.ratelimit import world_delays
+from boundlexx.boundless.models import World
+
+
+@click.command()
+@click.option(
+    "-a",
+    "--all",
+    "show_all",
+    is_flag=True,
+    help="Include worlds that have not been throttled",
+)
+@click.option(
+    "-r",
+    "--reset",
+    is_flag=True,
+    help="Reset learned delays",
+)
+def command(show_all, reset):
+    worlds = {w.id: w for w in World.objects.filter(active=True, api_url__isnull=False)}
+
+    if reset:
+        for world_id in worlds:
+            world_delays.reset(world_id)
+        click.echo(f"Reset {len(worlds)} world(s)")
+        return
+
+    stats = world_delays.get_stats(list(worlds.keys()))
+    stats = sorted(
+        stats.items(),
+        key=lambda s: (s[1]["delay"], s[1]["throttle_ratio"]),
+        reverse=True,
+    )
+
+    click.echo(
+        f"{'ID':>6} {'World':<30} {'Delay':>7} {'OK':>8} {'403':>8} {'403 %':>6}"
+    )
+    for world_id, world_stats in stats:
+        if not show_all and world_stats["throttled"] == 0:
+            continue
+
+        click.echo(
+            f"{world_id:>6} {worlds[world_id].display_name[:30]:<30} "
+            f"{world_stats['delay']:>7.2f} {world_stats['success']:>8} "
+            f"{world_stats['throttled']:>8} {world_stats['throttle_ratio']:>6.1%}"
+        )
@@ -0,0 +1,47 @@
+from prometheus_client import Counter, Histogram
+
+HTTP_POOL_HITS = Counter(
+    "boundless_http_pool_hits_total",
+    "Boundless API requests that reused a kept alive connection",
+    ["host"],
+)
+HTTP_POOL_MISSES = Counter(
+    "boundless_http_pool_misses_total",
+    "Boundless API requests that had to open a new connection",
+    ["host"],
+)
+HTTP_POOL_EVICTIONS = Counter(
+    "boundless_http_pool_evictions_total",
+    "Boundless API sessions closed for being idle or over the host limit",
+)
+
+QUERY_TOKEN_REFRESH_SECONDS = Histogram(
+    "boundless_query_token_refresh_seconds",
+    "Time taken to log in and get a new query token",
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+
+PRICE_POLLS = Counter(
+    "boundless_price_polls_total",
+    "Shop price polls by whether the prices changed since the last poll",
+    ["result"],
+)
+
+NAME_CACHE_HITS = Counter(
+    "boundless_name_cache_hits_total",
+    "Rendered names served from the name cache",
+    ["tier"],
+)
+NAME_CACHE_MISSES = Counter(
+    "boundless_name_cache_misses_total",
+    "Names that had to be rendered",
+)
+
+WORLD_POLL_STAGE_SECONDS = Histogram(
+    "boundless_world_poll_stage_seconds",
+    "Time spent in each stage of a world poll run. `fetch` and `write` are "
+    "per world, `fetch_wait` is fetchers blocked on a full queue (DB bound) "
+    "and `write_wait` is the writer waiting on an empty queue (network bound)",
+    ["stage"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
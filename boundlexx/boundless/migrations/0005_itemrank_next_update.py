@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def _query_delay(rank):
+    delay = settings.BOUNDLESS_BASE_ITEM_DELAY
+
+    offset = settings.BOUNDLESS_INACTIVE_ITEM_DELAY_OFFSET
+    if rank <= 10:
+        offset = settings.BOUNDLESS_POPULAR_ITEM_DELAY_OFFSET
+        delay = max(
+            delay - offset * (10 - rank),
+            settings.BOUNDLESS_MIN_ITEM_DELAY,
+        )
+    elif rank <= 20:
+        delay = delay + offset * (rank - 11)
+    else:
+        delay = min(
+            delay
+            + offset * (rank - 11)
+            + offset * (rank - 20) * settings.BOUNDLESS_DEAD_ITEM_MULTIPLIER,
+            settings.BOUNDLESS_MAX_ITEM_DELAY,
+        )
+
+    return delay
+
+
+def backfill_next_update(apps, schema_editor):
+    for model_name in ("ItemBuyRank", "ItemSellRank"):
+        rank_klass = apps.get_model("boundless", model_name)
+
+        ranks = []
+        for rank in rank_klass.objects.filter(last_update__isnull=False).iterator():
+            rank.next_update = rank.last_update + timedelta(
+                minutes=_query_delay(rank.rank)
+            )
+            ranks.append(rank)
+
+            if len(ranks) >= 1000:
+                rank_klass.objects.bulk_update(ranks, ["next_update"])
+                ranks = []
+
+        if len(ranks) > 0:
+            rank_klass.objects.bulk_update(ranks, ["next_update"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boundless', '0004_auto_20220920_2328'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itembuyrank',
+            name='next_update',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='itemsellrank',
+            name='next_update',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_next_update, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boundless', '0005_itemrank_next_update'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worldpoll',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
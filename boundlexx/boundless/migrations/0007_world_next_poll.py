@@ -0,0 +1,22 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boundless', '0006_worldpoll_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='world',
+            name='next_poll',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='world',
+            name='poll_idle_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
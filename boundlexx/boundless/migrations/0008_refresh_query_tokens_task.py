@@ -0,0 +1,39 @@
+from django.db import migrations
+
+REFRESH_QUERY_TOKENS_TASK = "boundlexx.boundless.tasks.tokens.refresh_query_tokens"
+
+
+def create_task(apps, schema_editor):
+    IntervalSchedule = apps.get_model("django_celery_beat", "IntervalSchedule")
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+
+    # tokens are refreshed an hour before they expire by default, checking
+    # every 15 minutes keeps them from expiring on idle accounts
+    interval, _ = IntervalSchedule.objects.get_or_create(every=15, period="minutes")
+
+    PeriodicTask.objects.get_or_create(
+        task=REFRESH_QUERY_TOKENS_TASK,
+        defaults={
+            "name": "Refresh Query Tokens",
+            "interval": interval,
+            "enabled": True,
+        },
+    )
+
+
+def delete_task(apps, schema_editor):
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+
+    PeriodicTask.objects.filter(task=REFRESH_QUERY_TOKENS_TASK).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boundless', '0007_world_next_poll'),
+        ('django_celery_beat', '0016_alter_crontabschedule_timezone'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_task, delete_task),
+    ]
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from boundlexx.api.utils import PURGE_GROUPS, queue_purge_paths
+from boundlexx.api.utils import get_purge_paths, queue_purge_paths
 from boundlexx.boundless.models.game import (
     AltItem,
     Block,
@@ -38,6 +39,7 @@ from boundlexx.boundless.models.shop import (
     ItemSellRank,
     ItemShopPrice,
     ItemShopStandPrice,
+    get_price_state_hash,
 )
 from boundlexx.boundless.models.world import (
     Beacon,
@@ -52,7 +54,9 @@ from boundlexx.boundless.models.world import (
     WorldDistance,
     WorldPoll,
     WorldPollResult,
+    bump_resource_items_version,
 )
+from boundlexx.boundless.utils import bump_name_catalog_version
 
 __all__ = [
     "AltItem",
@@ -98,6 +102,7 @@ __all__ = [
     "WorldDistance",
     "WorldPoll",
     "WorldPollResult",
+    "get_price_state_hash",
 ]
 
 
@@ -106,12 +111,7 @@ def queue_purge_cache_worlds(sender, instance=None, **kwargs):
     if instance is None:
         return
 
-    paths = PURGE_GROUPS[sender.__name__]
-
-    for index, path in enumerate(paths):
-        paths[index] = path.replace("{world_id}", str(instance.id))
-
-    queue_purge_paths(paths)
+    queue_purge_paths(get_purge_paths(sender.__name__, world_id=instance.id))
 
 
 @receiver(post_save, sender=Color)
@@ -119,12 +119,7 @@ def queue_purge_cache_colors(sender, instance=None, **kwargs):
     if instance is None:
         return
 
-    paths = PURGE_GROUPS[sender.__name__]
-
-    for index, path in enumerate(paths):
-        paths[index] = path.replace("{color_id}", str(instance.game_id))
-
-    queue_purge_paths(paths)
+    queue_purge_paths(get_purge_paths(sender.__name__, color_id=instance.game_id))
 
 
 @receiver(post_save, sender=Item)
@@ -132,12 +127,7 @@ def queue_purge_cache_items(sender, instance=None, **kwargs):
     if instance is None:
         return
 
-    paths = PURGE_GROUPS[sender.__name__]
-
-    for index, path in enumerate(paths):
-        paths[index] = path.replace("{item_id}", str(instance.game_id))
-
-    queue_purge_paths(paths)
+    queue_purge_paths(get_purge_paths(sender.__name__, item_id=instance.game_id))
 
 
 @receiver(post_save, sender=ItemShopStandPrice)
@@ -145,13 +135,13 @@ def queue_purge_cache_shop_stands(sender, instance=None, **kwargs):
     if instance is None:
         return
 
-    paths = PURGE_GROUPS[sender.__name__]
-
-    for index, path in enumerate(paths):
-        path = path.replace("{item_id}", str(instance.item.game_id))
-        paths[index] = path.replace("{world_id}", str(instance.world.id))
-
-    queue_purge_paths(paths)
+    queue_purge_paths(
+        get_purge_paths(
+            sender.__name__,
+            item_id=instance.item.game_id,
+            world_id=instance.world.id,
+        )
+    )
 
 
 @receiver(post_save, sender=ItemRequestBasketPrice)
@@ -159,13 +149,13 @@ def queue_purge_cache_request_baskets(sender, instance=None, **kwargs):
     if instance is None:
         return
 
-    paths = PURGE_GROUPS[sender.__name__]
-
-    for index, path in enumerate(paths):
-        path = path.replace("{item_id}", str(instance.item.game_id))
-        paths[index] = path.replace("{world_id}", str(instance.world.id))
-
-    queue_purge_paths(paths)
+    queue_purge_paths(
+        get_purge_paths(
+            sender.__name__,
+            item_id=instance.item.game_id,
+            world_id=instance.world.id,
+        )
+    )
 
 
 @receiver(post_save, sender=WorldPoll)
@@ -173,12 +163,7 @@ def queue_purge_cache_polls(sender, instance=None, **kwargs):
     if instance is None:
         return
 
-    paths = PURGE_GROUPS[sender.__name__]
-
-    for index, path in enumerate(paths):
-        paths[index] = path.replace("{world_id}", str(instance.world.id))
-
-    queue_purge_paths(paths)
+    queue_purge_paths(get_purge_paths(sender.__name__, world_id=instance.world.id))
 
 
 @receiver(post_save, sender=ResourceCount)
@@ -186,12 +171,7 @@ def queue_purge_cache_resource_counts(sender, instance=None, **kwargs):
     if instance is None:
         return
 
-    paths = PURGE_GROUPS[sender.__name__]
-
-    for index, path in enumerate(paths):
-        paths[index] = path.replace("{item_id}", str(instance.item.game_id))
-
-    queue_purge_paths(paths)
+    queue_purge_paths(get_purge_paths(sender.__name__, item_id=instance.item.game_id))
 
 
 @receiver(post_save, sender=WorldBlockColor)
@@ -199,12 +179,34 @@ def queue_purge_cache_block_colors(sender, instance=None, **kwargs):
     if instance is None:
         return
 
-    paths = PURGE_GROUPS[sender.__name__]
+    ids = {
+        "item_id": instance.item.game_id,
+        "color_id": instance.color.game_id,
+    }
+    if instance.world is not None:
+        ids["world_id"] = instance.world.id
+
+    queue_purge_paths(get_purge_paths(sender.__name__, **ids))
 
-    for index, path in enumerate(paths):
-        path = path.replace("{item_id}", str(instance.item.game_id))
-        if instance.world is not None:
-            path = path.replace("{world_id}", str(instance.world.id))
-        paths[index] = path.replace("{color_id}", str(instance.color.game_id))
 
-    queue_purge_paths(paths)
+@receiver(post_save, sender=Color)
+@receiver(post_delete, sender=Color)
+@receiver(post_save, sender=ColorValue)
+@receiver(post_delete, sender=ColorValue)
+@receiver(post_save, sender=LocalizedName)
+@receiver(post_delete, sender=LocalizedName)
+@receiver(post_save, sender=Emoji)
+@receiver(post_delete, sender=Emoji)
+@receiver(post_save, sender=EmojiAltName)
+@receiver(post_delete, sender=EmojiAltName)
+def invalidate_name_cache(sender, instance=None, **kwargs):
+    bump_name_catalog_version()
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+@receiver(post_save, sender=ResourceData)
+@receiver(post_delete, sender=ResourceData)
+def invalidate_resource_items(sender, instance=None, **kwargs):
+    # after commit, so other processes can not reload the old items
+    transaction.on_commit(bump_resource_items_version)
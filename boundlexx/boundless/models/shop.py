@@ -1,30 +1,48 @@
 from __future__ import annotations
 
 from datetime import timedelta
+from typing import Iterable
 
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from django_prometheus.models import ExportModelOperationsMixin
 
+from boundlexx.api.utils import get_purge_paths, queue_purge_paths
 from boundlexx.boundless.game import Location, ShopItem
 from boundlexx.boundless.game import World as SimpleWorld
 from boundlexx.boundless.models.game import Item
 from boundlexx.boundless.models.world import World
-from boundlexx.boundless.utils import html_name
+from boundlexx.boundless.utils import get_names
+
+
+def get_price_state_hash(  # pylint: disable=too-many-arguments
+    item_id: int,
+    world_id: int,
+    location: Location,
+    price,
+    item_count: int,
+    beacon_name: str,
+    guild_tag: str,
+    shop_activity: int,
+) -> bytes:
+    return (
+        f"{item_id}:{world_id}:{location.x}:{location.y}:{location.z}:{price}:"
+        f"{item_count}:{shop_activity}:{guild_tag}:{beacon_name}"
+    ).encode("utf8")
 
 
 class ItemShopPriceManager(models.Manager):
     def create_from_shop_item(
-        self, world: SimpleWorld, item: Item, shop_item: ShopItem, colors=None
+        self, world: SimpleWorld, item: Item, shop_item: ShopItem
     ) -> ItemShopPrice:
+        beacon_text_name, beacon_html_name = get_names(shop_item.beacon_name)
+
         return self.create(
             item_id=item.id,
             beacon_name=shop_item.beacon_name,
-            beacon_text_name=html_name(
-                shop_item.beacon_name, strip=True, colors=colors
-            ),
-            beacon_html_name=html_name(shop_item.beacon_name, colors=colors),
+            beacon_text_name=beacon_text_name,
+            beacon_html_name=beacon_html_name,
             guild_tag=shop_item.guild_tag,
             item_count=shop_item.item_count,
             shop_activity=shop_item.shop_activity,
@@ -35,6 +53,52 @@ class ItemShopPriceManager(models.Manager):
             world=World.objects.get(id=world.id, active=True),
         )
 
+    def bulk_create_from_shop_items(
+        self,
+        world: SimpleWorld,
+        item: Item,
+        shop_items: Iterable[ShopItem],
+    ) -> list[ItemShopPrice]:
+        """
+        Creates the prices for every shop selling/buying `item` on `world` with
+        a single insert.
+
+        `bulk_create` does not send `post_save`, so the API cache for the
+        item/world is purged once here instead of once per price.
+        """
+
+        db_world = World.objects.get(id=world.id, active=True)
+
+        prices = []
+        for shop_item in shop_items:
+            beacon_text_name, beacon_html_name = get_names(shop_item.beacon_name)
+            prices.append(
+                self.model(
+                    item=item,
+                    beacon_name=shop_item.beacon_name,
+                    beacon_text_name=beacon_text_name,
+                    beacon_html_name=beacon_html_name,
+                    guild_tag=shop_item.guild_tag,
+                    item_count=shop_item.item_count,
+                    shop_activity=shop_item.shop_activity,
+                    price=shop_item.price,
+                    location_x=shop_item.location.x,
+                    location_y=shop_item.location.y,
+                    location_z=shop_item.location.z,
+                    world=db_world,
+                )
+            )
+
+        if len(prices) > 0:
+            prices = self.bulk_create(prices)
+            queue_purge_paths(
+                get_purge_paths(
+                    self.model.__name__, item_id=item.game_id, world_id=db_world.id
+                )
+            )
+
+        return prices
+
 
 class ItemShopPrice(models.Model):
     time = models.DateTimeField(auto_now=True, primary_key=True)
@@ -82,11 +146,16 @@ class ItemShopPrice(models.Model):
 
     @property
     def state_hash(self):
-        return (
-            f"{self.item.id}:{self.world.id}:{self.location_x}:"
-            f"{self.location_y}:{self.location_z}:{self.price}:"
-            f"{self.item_count}"
-        ).encode("utf8")
+        return get_price_state_hash(
+            self.item.id,
+            self.world.id,
+            self.location,
+            self.price,
+            self.item_count,
+            self.beacon_name,
+            self.guild_tag,
+            self.shop_activity,
+        )
 
 
 class ItemShopStandPrice(ExportModelOperationsMixin("item_shop_stand_price"), ItemShopPrice):  # type: ignore # noqa E50
@@ -102,6 +171,7 @@ class ItemRank(models.Model):
     world = models.ForeignKey(World, on_delete=models.CASCADE)
     rank = models.PositiveSmallIntegerField(default=20)
     last_update = models.DateTimeField(blank=True, null=True)
+    next_update = models.DateTimeField(default=timezone.now, db_index=True)
     state_hash = models.CharField(max_length=128, default="")
 
     class Meta:
@@ -151,11 +221,16 @@ class ItemRank(models.Model):
 
         return delay
 
-    @property
-    def next_update(self):
+    def schedule_update(self):
         if self.last_update is None:
-            return timezone.now() - timedelta(minutes=1)
-        return self.last_update + timedelta(minutes=self.query_delay)
+            self.next_update = timezone.now() - timedelta(minutes=1)
+        else:
+            self.next_update = self.last_update + timedelta(minutes=self.query_delay)
+
+    def save(self, *args, **kwargs):
+        self.schedule_update()
+
+        super().save(*args, **kwargs)
 
 
 class ItemBuyRank(ExportModelOperationsMixin("item_buy_rank"), ItemRank):  # type: ignore # noqa E50
@@ -1,7 +1,12 @@
 # pylint: disable=too-many-lines
 from __future__ import annotations
 
+import hashlib
+import json
+import time
+from collections import namedtuple
 from datetime import datetime, timedelta
+from typing import Optional
 
 import pytz
 from django.conf import settings
@@ -14,6 +19,7 @@ from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 from django_prometheus.models import ExportModelOperationsMixin
 
+from boundlexx.api.utils import get_purge_paths, queue_purge_paths
 from boundlexx.boundless.game import BoundlessClient, Location
 from boundlexx.boundless.game import Settlement as SimpleSettlement
 from boundlexx.boundless.game import World as SimpleWorld
@@ -22,8 +28,8 @@ from boundlexx.boundless.utils import (
     calculate_extra_names,
     convert_linear_rgb_to_hex,
     convert_linear_rgb_to_srgb,
+    get_names,
     get_next_rank_update,
-    html_name,
 )
 from boundlexx.notifications import send_color_update_notification, send_exo_notifcation
 from boundlexx.utils import make_thumbnail
@@ -32,6 +38,13 @@ from config.storages import select_storage
 
 PORTAL_CONDUITS = [2, 3, 4, 6, 8, 10, 15, 18, 24]
 PROTECTION_SKILLS_CACHE = "boundless:protection_skills"
+RESOURCE_ITEMS_VERSION_KEY = "boundless:resource_items_version"
+# seconds between checking if the resource items for world polls have changed
+RESOURCE_ITEMS_VERSION_TTL = 30
+# changes in these between polls count as activity for `World.poll_delay`
+POLL_ACTIVITY_FIELDS = ("player_count", "beacon_count", "total_prestige")
+
+ResourceItem = namedtuple("ResourceItem", ("item_id", "game_id", "is_embedded"))
 
 User = get_user_model()
 
@@ -405,6 +418,9 @@ class World(  # pylint: disable=too-many-public-methods
         blank=True, null=True, storage=select_storage("atlas")
     )
 
+    next_poll = models.DateTimeField(default=timezone.now, db_index=True)
+    poll_idle_count = models.PositiveSmallIntegerField(default=0)
+
     def __str__(self):
         return f"{self.display_name} (ID: {self.id})"
 
@@ -422,6 +438,29 @@ class World(  # pylint: disable=too-many-public-methods
     def is_exo(self):
         return self.owner is None and not self.is_perm
 
+    @property
+    def poll_delay(self):
+        # doubles for every poll in a row without any activity
+        return min(
+            settings.BOUNDLESS_MIN_WORLD_POLL_DELAY * pow(2, self.poll_idle_count),
+            settings.BOUNDLESS_MAX_WORLD_POLL_DELAY,
+        )
+
+    def schedule_poll(self, has_activity, last_poll=None):
+        if has_activity:
+            self.poll_idle_count = 0
+        elif self.poll_delay < settings.BOUNDLESS_MAX_WORLD_POLL_DELAY:
+            self.poll_idle_count += 1
+
+        if last_poll is None:
+            last_poll = timezone.now()
+        self.next_poll = last_poll + timedelta(minutes=self.poll_delay)
+
+        # skip `save` so the poll schedule does not count as a world change
+        World.objects.filter(pk=self.pk).update(
+            next_poll=self.next_poll, poll_idle_count=self.poll_idle_count
+        )
+
     @property
     def atmosphere_color_tuple(self):
         if (
@@ -1151,9 +1190,95 @@ class WorldCreatureColor(ExportModelOperationsMixin("world_creature_color"), mod
         unique_together = ("world", "creature_type")
 
 
+def _sanitize_name(name: str) -> str:
+    # some beacons are just... werid? (names that cannot be encoded)
+    try:
+        name.encode("utf8")
+    except UnicodeEncodeError:
+        name = name.encode("latin1", errors="replace").decode("latin1")
+
+    return name
+
+
+_resource_items: Optional[list[Optional[ResourceItem]]] = None
+_resource_items_version: Optional[int] = None
+_resource_items_checked = 0.0
+
+
+def get_poll_fingerprint(world_dict: dict, poll_dict: dict) -> str:
+    """
+    Hash of everything a world poll stores, used to tell if the game returned
+    the same poll as last time.
+    """
+
+    data = {"players": world_dict["info"]["players"], "poll": poll_dict}
+
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, default=str).encode("utf8")
+    ).hexdigest()
+
+
+def get_resource_items() -> list[Optional[ResourceItem]]:
+    """
+    `BOUNDLESS_WORLD_POLL_RESOURCE_MAPPING` resolved to items, in the same
+    order as the resources in a world poll, `None` for items that do not
+    exist. Cached per process until the version is bumped
+    (`bump_resource_items_version`), which is checked against the Django
+    cache every `RESOURCE_ITEMS_VERSION_TTL` seconds.
+    """
+
+    global _resource_items, _resource_items_version, _resource_items_checked  # pylint: disable=global-statement  # noqa: E501
+
+    now = time.monotonic()
+    if (
+        _resource_items is None
+        or now - _resource_items_checked > RESOURCE_ITEMS_VERSION_TTL
+    ):
+        version = cache.get_or_set(
+            RESOURCE_ITEMS_VERSION_KEY, int(time.time()), timeout=None
+        )
+        _resource_items_checked = now
+
+        if version != _resource_items_version:
+            _resource_items = None
+            _resource_items_version = version
+
+    if _resource_items is None:
+        resource_order = settings.BOUNDLESS_WORLD_POLL_RESOURCE_MAPPING
+        items = Item.objects.filter(game_id__in=resource_order).select_related(
+            "resource_data"
+        )
+
+        by_game_id = {}
+        for item in items:
+            is_embedded = False
+            if hasattr(item, "resource_data"):
+                is_embedded = item.resource_data.is_embedded
+            by_game_id[item.game_id] = ResourceItem(item.id, item.game_id, is_embedded)
+
+        _resource_items = [by_game_id.get(game_id) for game_id in resource_order]
+
+    return _resource_items
+
+
+def bump_resource_items_version():
+    """
+    Invalidates the resource items from `get_resource_items` in all processes.
+    """
+
+    global _resource_items  # pylint: disable=global-statement
+
+    try:
+        cache.incr(RESOURCE_ITEMS_VERSION_KEY)
+    except ValueError:
+        cache.set(RESOURCE_ITEMS_VERSION_KEY, int(time.time()), timeout=None)
+
+    _resource_items = None
+
+
 class WorldPollManager(models.Manager):
     def _create_resource_counts(self, world_poll, resources_list):
-        resource_order = settings.BOUNDLESS_WORLD_POLL_RESOURCE_MAPPING
+        resource_items = get_resource_items()
 
         resources = []
         embedded_total = 0
@@ -1163,40 +1288,78 @@ class WorldPollManager(models.Manager):
             if amount == 0:
                 continue
 
-            item_id = resource_order[index]
-            item = Item.objects.select_related("resource_data").get(game_id=item_id)
+            resource_item = resource_items[index]
+            if resource_item is None:
+                game_id = settings.BOUNDLESS_WORLD_POLL_RESOURCE_MAPPING[index]
+                raise Item.DoesNotExist(f"Resource item does not exist: {game_id}")
 
-            is_embedded = False
-            if hasattr(item, "resource_data"):
-                is_embedded = item.resource_data.is_embedded
-            resources.append((item, amount, is_embedded))
+            resources.append((resource_item, amount))
 
-            if is_embedded:
+            if resource_item.is_embedded:
                 embedded_total += amount
             else:
                 surface_total += amount
 
-        for item_data in resources:
-            item, amount, is_embedded = item_data[0], item_data[1], item_data[2]
-
-            if is_embedded:
+        counts = []
+        world_size = pow(world_poll.world.size, 2)
+        for resource_item, amount in resources:
+            if resource_item.is_embedded:
                 total = embedded_total
             else:
                 total = surface_total
 
-            ResourceCount.objects.create(
-                world_poll=world_poll,
-                item=item,
-                count=amount,
-                percentage=(amount / total) * 100,
-                average_per_chunk=amount / pow(world_poll.world.size, 2),
+            counts.append(
+                ResourceCount(
+                    world_poll=world_poll,
+                    item_id=resource_item.item_id,
+                    count=amount,
+                    percentage=(amount / total) * 100,
+                    average_per_chunk=amount / world_size,
+                )
+            )
+
+        if len(counts) == 0:
+            return
+
+        # `bulk_create` does not send `post_save`, purge for all items at once
+        ResourceCount.objects.bulk_create(counts)
+
+        paths = []
+        for resource_item, _amount in resources:
+            paths += get_purge_paths("ResourceCount", item_id=resource_item.game_id)
+        queue_purge_paths(paths)
+
+    def _create_leaderboard(self, world_poll, leaderboard):
+        records = []
+        for rank, leader in enumerate(leaderboard):
+            name = _sanitize_name(leader["name"])
+            text_name, html_name = get_names(name)
+
+            records.append(
+                LeaderboardRecord(
+                    world_poll=world_poll,
+                    world_rank=rank + 1,
+                    guild_tag=leader["mayor"].get("guildTag", ""),
+                    mayor_id=leader["mayor"]["id"],
+                    mayor_name=_sanitize_name(leader["mayor"]["name"]),
+                    mayor_type=leader["mayor"]["type"],
+                    name=name,
+                    text_name=text_name,
+                    html_name=html_name,
+                    prestige=leader["prestige"],
+                )
             )
 
+        if len(records) > 0:
+            LeaderboardRecord.objects.bulk_create(records)
+
     def create_from_game_dict(self, world_dict, poll_dict, world=None, new_world=False):
         if world is None:
             world, new_world = World.objects.get_or_create_from_game_dict(world_dict)
 
-        world_poll = self.create(world=world)
+        world_poll = self.create(
+            world=world, fingerprint=get_poll_fingerprint(world_dict, poll_dict)
+        )
 
         WorldPollResult.objects.create(
             world_poll=world_poll,
@@ -1207,35 +1370,7 @@ class WorldPollManager(models.Manager):
         )
 
         self._create_resource_counts(world_poll, poll_dict["resources"])
-
-        colors = Color.objects.all()
-        for rank, leader in enumerate(poll_dict["leaderboard"]):
-            rank += 1
-
-            args = {
-                "world_poll": world_poll,
-                "world_rank": rank,
-                "guild_tag": leader["mayor"].get("guildTag", ""),
-                "mayor_id": leader["mayor"]["id"],
-                "mayor_name": leader["mayor"]["name"],
-                "mayor_type": leader["mayor"]["type"],
-                "name": leader["name"],
-                "text_name": html_name(leader["name"], strip=True, colors=colors),
-                "html_name": html_name(leader["name"], colors=colors),
-                "prestige": leader["prestige"],
-            }
-
-            try:
-                LeaderboardRecord.objects.create(**args)
-            except UnicodeEncodeError:
-                # some beacons are just... werid?
-                args["name"] = (
-                    args["name"].encode("latin1", errors="replace").decode("latin1")
-                )
-                args["text_name"] = html_name(args["name"], strip=True, colors=colors)
-                args["html_name"] = html_name(args["name"], colors=colors)
-
-                LeaderboardRecord.objects.create(**args)
+        self._create_leaderboard(world_poll, poll_dict["leaderboard"])
 
         world_poll.refresh_from_db()
 
@@ -1245,14 +1380,14 @@ class WorldPollManager(models.Manager):
                 calculate_distances,
             )
 
-            calculate_distances.delay([world.id])
+            transaction.on_commit(lambda: calculate_distances.delay([world.id]))
 
         if (
             world.is_public
             and not world.notification_sent
             and (new_world or world.is_sovereign)
         ):
-            send_exo_notifcation(world_poll)
+            transaction.on_commit(lambda: send_exo_notifcation(world_poll))
 
         return world_poll
 
@@ -1263,6 +1398,7 @@ class WorldPoll(ExportModelOperationsMixin("world_poll"), models.Model):  # type
     world = models.ForeignKey("World", on_delete=models.CASCADE)
     active = models.BooleanField(db_index=True, default=True)
     time = models.DateTimeField(auto_now_add=True)
+    fingerprint = models.CharField(max_length=64, blank=True, default="")
 
     @property
     def result(self):
@@ -1270,6 +1406,24 @@ class WorldPoll(ExportModelOperationsMixin("world_poll"), models.Model):  # type
             return result
         return None
 
+    def has_activity_since(self, previous) -> bool:
+        if previous is None:
+            return True
+
+        # the game returned the exact same poll
+        if self.fingerprint != "" and self.fingerprint == previous.fingerprint:
+            return False
+
+        result = self.result
+        previous_result = previous.result
+        if result is None or previous_result is None:
+            return True
+
+        return any(
+            getattr(result, field) != getattr(previous_result, field)
+            for field in POLL_ACTIVITY_FIELDS
+        )
+
     @property
     def resources(self):
         return self.resourcecount_set.all()
@@ -1413,15 +1567,17 @@ class BeaconPlotColumn(ExportModelOperationsMixin("beacon_plot_column"), models.
 
 
 class SettlementManager(models.Manager):
-    def create_from_game_obj(self, world, settlement: SimpleSettlement, colors=None):
+    def create_from_game_obj(self, world, settlement: SimpleSettlement):
+        text_name, html_name = get_names(settlement.name)
+
         return self.create(
             world=world,
             location_x=settlement.location.x,
             location_z=settlement.location.z,
             prestige=settlement.prestige,
             name=settlement.name,
-            text_name=html_name(settlement.name, strip=True, colors=colors),
-            html_name=html_name(settlement.name, colors=colors),
+            text_name=text_name,
+            html_name=html_name,
         )
 
 
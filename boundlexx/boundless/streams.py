@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+PRICE_CHANGES_STREAM = "boundless:price_changes"
+
+
+class PriceChangeStream:
+    """
+    Redis Stream of shop price changes for an item on a world.
+
+    Each entry has the item game ID, world ID, `price_type`
+    (`request-basket` or `shop-stand`) and the shops `added` and `removed`
+    since the previous poll. The stream is capped at roughly
+    `BOUNDLESS_PRICE_STREAM_MAX_LENGTH` entries. Consumers resume from the
+    last entry ID they have seen.
+
+    Does nothing if the cache backend is not Redis.
+    """
+
+    key: str
+
+    def __init__(self, key: str = PRICE_CHANGES_STREAM):
+        self.key = key
+
+    def _get_client(self):
+        try:
+            return cache.client.get_client()  # type: ignore
+        except AttributeError:
+            return None
+
+    def publish(  # pylint: disable=too-many-arguments
+        self,
+        item_id: int,
+        world_id: int,
+        price_type: str,
+        added: list[dict],
+        removed: list[dict],
+    ) -> Optional[str]:
+        client = self._get_client()
+        if client is None:
+            return None
+
+        event = {
+            "item_id": item_id,
+            "world_id": world_id,
+            "price_type": price_type,
+            "added": added,
+            "removed": removed,
+        }
+
+        try:
+            entry_id = client.xadd(
+                self.key,
+                {"data": json.dumps(event, separators=(",", ":"))},
+                maxlen=settings.BOUNDLESS_PRICE_STREAM_MAX_LENGTH,
+                approximate=True,
+            )
+        except Exception as ex:  # pylint: disable=broad-except
+            # consumers missing a change is not worth failing a price run
+            logger.warning("Could not publish price change: %s", ex)
+            return None
+
+        return entry_id.decode("utf8")
+
+    def read(self, since: Optional[str] = None, count: int = 100) -> list[dict]:
+        """
+        Returns up to `count` events after the entry ID `since`, oldest first.
+        If `since` is not set, returns the latest `count` events.
+        """
+
+        client = self._get_client()
+        if client is None:
+            return []
+
+        if since is None:
+            entries = list(reversed(client.xrevrange(self.key, count=count)))
+        else:
+            response = client.xread({self.key: since}, count=count)
+            entries = response[0][1] if len(response) > 0 else []
+
+        events = []
+        for entry_id, fields in entries:
+            event = json.loads(fields[b"data"])
+            event["id"] = entry_id.decode("utf8")
+            events.append(event)
+
+        return events
+
+
+price_changes = PriceChangeStream()
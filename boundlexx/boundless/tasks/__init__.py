@@ -14,6 +14,7 @@ from boundlexx.boundless.tasks.shop import (
     update_prices,
     update_prices_split,
 )
+from boundlexx.boundless.tasks.tokens import refresh_query_tokens
 from boundlexx.boundless.tasks.worlds import (
     calculate_distances,
     discover_all_worlds,
@@ -23,6 +24,7 @@ from boundlexx.boundless.tasks.worlds import (
     poll_settlements,
     poll_sovereign_worlds,
     poll_worlds,
+    poll_worlds_split,
     search_new_worlds,
 )
 from boundlexx.notifications.models import ExoworldNotification
@@ -45,7 +47,9 @@ __all__ = [
     "poll_settlements",
     "poll_sovereign_worlds",
     "poll_worlds",
+    "poll_worlds_split",
     "recalculate_colors",
+    "refresh_query_tokens",
     "search_new_worlds",
     "search_new_worlds",
     "update_prices_split",
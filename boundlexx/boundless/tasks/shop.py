@@ -1,23 +1,26 @@
 import hashlib
+import json
 import re
 import time
 from ast import literal_eval
 from collections import namedtuple
-from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from http.client import RemoteDisconnected
 
 from celery.utils.log import get_task_logger
 from django.conf import settings
 from django.core.cache import cache
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.utils import timezone
 from django_celery_results.models import TaskResult
 from requests.exceptions import ConnectionError as RequestsConnectionError
 
+from boundlexx.api.utils import send_purge_paths
 from boundlexx.boundless.game import HTTP_ERRORS, BoundlessClient
 from boundlexx.boundless.game import World as SimpleWorld
+from boundlexx.boundless.metrics import PRICE_POLLS
 from boundlexx.boundless.models import (
-    Color,
     Item,
     ItemBuyRank,
     ItemRank,
@@ -25,7 +28,9 @@ from boundlexx.boundless.models import (
     ItemSellRank,
     ItemShopStandPrice,
     World,
+    get_price_state_hash,
 )
+from boundlexx.boundless.streams import price_changes
 from config.celery_app import app
 
 logger = get_task_logger(__name__)
@@ -34,6 +39,16 @@ logger = get_task_logger(__name__)
 UpdateOption = namedtuple(
     "UpdateOption", ("rank_klass", "client_method", "price_klass")
 )
+UPDATE_OPTIONS = [
+    UpdateOption(ItemBuyRank, "shop_buy", ItemRequestBasketPrice),
+    UpdateOption(ItemSellRank, "shop_sell", ItemShopStandPrice),
+]
+
+
+PRICE_TYPES = {
+    ItemRequestBasketPrice: "request-basket",
+    ItemShopStandPrice: "shop-stand",
+}
 
 
 UPDATE_PRICES_LOCK = "boundless:update_prices"
@@ -154,45 +169,199 @@ def _update_prices_multi(worlds, name=None):
             logger.warning("Could not release lock: %s", ex)
 
 
-def _get_ranks(item, rank_klass, all_worlds):
+RankMap = dict[tuple[int, int], ItemRank]
+RANK_UPDATE_FIELDS = ["rank", "state_hash", "last_update", "next_update"]
+
+
+def _create_missing_ranks(items, all_worlds):
+    """
+    Creates the missing ranks for new items/worlds so they get polled. Only
+    worlds without a rank for every item are checked.
+    """
+
+    item_ids = {i.id for i in items}
+    world_ids = {w.id for w in all_worlds}
+
+    for option in UPDATE_OPTIONS:
+        ranks = option.rank_klass.objects.filter(item_id__in=item_ids)
+        counts = dict(
+            ranks.filter(world_id__in=world_ids)
+            .order_by()
+            .values_list("world_id")
+            .annotate(count=Count("id"))
+        )
+        incomplete = {w for w in world_ids if counts.get(w, 0) < len(item_ids)}
+
+        if len(incomplete) == 0:
+            continue
+
+        existing = set(
+            ranks.filter(world_id__in=incomplete).values_list("item_id", "world_id")
+        )
+        missing = [
+            option.rank_klass(item_id=item_id, world_id=world_id)
+            for item_id in item_ids
+            for world_id in incomplete
+            if (item_id, world_id) not in existing
+        ]
+        option.rank_klass.objects.bulk_create(missing, ignore_conflicts=True)
+
+
+def _load_due_ranks(items, all_worlds) -> dict[type[ItemRank], RankMap]:
+    """
+    Loads only the due ranks for the run with one query per rank type, keyed
+    by `(item_id, world_id)`.
+    """
+
+    item_ids = {i.id for i in items}
+    world_ids = {w.id for w in all_worlds}
+    now = timezone.now()
+
+    rank_maps: dict[type[ItemRank], RankMap] = {}
+    for option in UPDATE_OPTIONS:
+        ranks = option.rank_klass.objects.filter(
+            item_id__in=item_ids, world_id__in=world_ids, next_update__lte=now
+        )
+        rank_maps[option.rank_klass] = {(r.item_id, r.world_id): r for r in ranks}
+
+    return rank_maps
+
+
+def _get_due_items(items, rank_maps: dict[type[ItemRank], RankMap]):
+    """
+    Returns only the items with at least one due rank, ordered by their most
+    overdue rank.
+    """
+
+    deadlines: dict[int, datetime] = {}
+    for rank_map in rank_maps.values():
+        for (item_id, _), rank in rank_map.items():
+            deadline = deadlines.get(item_id)
+            if deadline is None or rank.next_update < deadline:
+                deadlines[item_id] = rank.next_update
+
+    due_items = [i for i in items if i.id in deadlines]
+    return sorted(due_items, key=lambda i: deadlines[i.id])
+
+
+def _get_ranks(item, rank_map: RankMap, all_worlds):
     ranks: dict[int, ItemRank] = {}
     worlds: list[SimpleWorld] = []
 
     now = timezone.now()
-
+    due_ranks = []
     for world in all_worlds:
-        rank, _ = rank_klass.objects.get_or_create(item=item, world=world)
-        if rank.next_update < now:
-            ranks[world.id] = rank
-            worlds.append(SimpleWorld(world.id, world.api_url))
+        rank = rank_map.get((item.id, world.id))
+        if rank is not None and rank.next_update <= now:
+            due_ranks.append((rank, world))
+
+    for rank, world in sorted(due_ranks, key=lambda r: r[0].next_update):
+        ranks[world.id] = rank
+        worlds.append(SimpleWorld(world.id, world.api_url))
 
     return ranks, worlds
 
 
-def _create_item_prices(shops, price_klass, world: SimpleWorld, item):
-    shops = sorted(
+def _sort_shops(shops):
+    return sorted(
         shops,
         key=lambda s: f"{s.location.x},{s.location.y},{s.location.z}",
     )
 
-    colors = Color.objects.all()
 
-    total = 0
+def _get_state_hash(shops, world: SimpleWorld, item) -> str:
+    """
+    Digest of the (sorted) shops for an item on a world, computed from the
+    API response so unchanged polls can be detected before any writes. Covers
+    every field stored on the prices, so none of them go stale.
+    """
+
     state_hash = hashlib.sha512()
     for shop in shops:
-        item_price = price_klass.objects.create_from_shop_item(
-            world, item, shop, colors=colors
+        state_hash.update(
+            get_price_state_hash(
+                item.id,
+                world.id,
+                shop.location,
+                shop.price,
+                shop.item_count,
+                shop.beacon_name,
+                shop.guild_tag,
+                shop.shop_activity,
+            )
+        )
+
+    return str(state_hash.hexdigest())
+
+
+def _shop_event(  # pylint: disable=too-many-arguments
+    x, y, z, price, item_count, beacon_name, guild_tag
+):
+    return {
+        "location": {"x": x, "y": y, "z": z},
+        "price": f"{price:.2f}",
+        "item_count": item_count,
+        "beacon_name": beacon_name,
+        "guild_tag": guild_tag,
+    }
+
+
+def _publish_price_changes(shops, old_prices, price_klass, world, item):
+    new_shops = {}
+    for shop in shops:
+        event = _shop_event(
+            shop.location.x,
+            shop.location.y,
+            shop.location.z,
+            shop.price,
+            shop.item_count,
+            shop.beacon_name,
+            shop.guild_tag,
+        )
+        new_shops[json.dumps(event, sort_keys=True)] = event
+
+    old_shops = {}
+    for price in old_prices:
+        event = _shop_event(*price)
+        old_shops[json.dumps(event, sort_keys=True)] = event
+
+    added = [e for k, e in new_shops.items() if k not in old_shops]
+    removed = [e for k, e in old_shops.items() if k not in new_shops]
+
+    if len(added) > 0 or len(removed) > 0:
+        price_changes.publish(
+            item.game_id, world.id, PRICE_TYPES[price_klass], added, removed
         )
 
-        state_hash.update(item_price.state_hash)
-        total += 1
 
-    return total, state_hash
+def _create_item_prices(shops, price_klass, world: SimpleWorld, item):
+    active_prices = price_klass.objects.filter(
+        item=item, active=True, world__id=world.id
+    )
+    old_prices = list(
+        active_prices.values_list(
+            "location_x",
+            "location_y",
+            "location_z",
+            "price",
+            "item_count",
+            "beacon_name",
+            "guild_tag",
+        )
+    )
+
+    # set all existing price records to inactive
+    active_prices.update(active=False)
+
+    item_prices = price_klass.objects.bulk_create_from_shop_items(world, item, shops)
+    _publish_price_changes(shops, old_prices, price_klass, world, item)
+
+    return len(item_prices)
 
 
 def _get_shops(client, client_method, item, world):
     try:
-        return getattr(client, client_method)(item.game_id, world=world)
+        return getattr(client, client_method)(item.game_id, world=world, lazy=True)
     except RequestsConnectionError as ex:
         if "RemoteDisconnected" not in str(ex):
             raise
@@ -203,43 +372,81 @@ def _get_shops(client, client_method, item, world):
     return None
 
 
-def _update_item_prices(
-    item, rank_klass, client_method: str, price_klass, all_worlds: list[SimpleWorld]
+def _iter_shops(client, client_method, item, worlds):
+    """
+    Yields `(world, shops)` for each world in order. Up to
+    `BOUNDLESS_PRICE_POLL_CONCURRENCY` worlds are fetched at once, each world
+    is still paced by its own rate limit.
+    """
+
+    concurrency = min(settings.BOUNDLESS_PRICE_POLL_CONCURRENCY, len(worlds))
+
+    if concurrency <= 1:
+        for world in worlds:
+            yield world, _get_shops(client, client_method, item, world)
+        return
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(_get_shops, client, client_method, item, world)
+            for world in worlds
+        ]
+
+        try:
+            for world, future in zip(worlds, futures):
+                yield world, future.result()
+        finally:
+            # stop polling the rest on an error
+            for future in futures:
+                future.cancel()
+
+
+def _update_item_prices(  # pylint: disable=too-many-arguments
+    item,
+    rank_klass,
+    client_method: str,
+    price_klass,
+    all_worlds: list[SimpleWorld],
+    rank_map: RankMap,
 ):
 
     client = BoundlessClient()
-    ranks, worlds = _get_ranks(item, rank_klass, all_worlds)
+    ranks, worlds = _get_ranks(item, rank_map, all_worlds)
 
     if len(ranks) == 0:
         return -1
 
     total = 0
+    updated_ranks: list[ItemRank] = []
 
-    for world in worlds:
-        shops = _get_shops(client, client_method, item, world)
-
-        if shops is None:
-            continue
-
-        # set all existing price records to inactive
-        price_klass.objects.filter(item=item, active=True, world__id=world.id).update(
-            active=False
-        )
+    try:
+        for world, shops in _iter_shops(client, client_method, item, worlds):
+            if shops is None:
+                continue
 
-        item_total, state_hash = _create_item_prices(shops, price_klass, world, item)
-        total += item_total
+            shops = _sort_shops(shops)
+            digest = _get_state_hash(shops, world, item)
+            rank = ranks[world.id]
 
-        digest = str(state_hash.hexdigest())
-        rank = ranks[world.id]
-        if rank.state_hash != "":
-            if rank.state_hash == digest:
+            if rank.state_hash != "" and rank.state_hash == digest:
+                # nothing changed, existing prices are still current
+                PRICE_POLLS.labels(result="unchanged").inc()
                 rank.decrease_rank()
+                total += len(shops)
             else:
-                rank.increase_rank()
-
-        rank.state_hash = digest
-        rank.last_update = timezone.now()
-        rank.save()
+                PRICE_POLLS.labels(result="changed").inc()
+                if rank.state_hash != "":
+                    rank.increase_rank()
+                total += _create_item_prices(shops, price_klass, world, item)
+
+            rank.state_hash = digest
+            rank.last_update = timezone.now()
+            rank.schedule_update()
+            updated_ranks.append(rank)
+    finally:
+        # flush even if a world errored so finished worlds are not re-polled
+        if len(updated_ranks) > 0:
+            rank_klass.objects.bulk_update(updated_ranks, RANK_UPDATE_FIELDS)
 
     return total
 
@@ -344,7 +551,10 @@ def _update_prices(worlds):
         return
 
     ids_to_remove = [w.id for w in worlds]
-    items = Item.objects.filter(active=True, can_be_sold=True)
+    items = list(Item.objects.filter(active=True, can_be_sold=True))
+    _create_missing_ranks(items, worlds)
+    rank_maps = _load_due_ranks(items, worlds)
+    items = _get_due_items(items, rank_maps)
     logger.info("Updating the prices for %s items", len(items))
 
     _log_worlds(worlds)
@@ -362,6 +572,7 @@ def _update_prices(worlds):
                     "shop_buy",
                     ItemRequestBasketPrice,
                     worlds,
+                    rank_maps[ItemBuyRank],
                 )
             except HTTP_ERRORS as ex:
                 response_code = None
@@ -383,7 +594,12 @@ def _update_prices(worlds):
 
             try:
                 sell_updated = _update_item_prices(
-                    item, ItemSellRank, "shop_sell", ItemShopStandPrice, worlds
+                    item,
+                    ItemSellRank,
+                    "shop_sell",
+                    ItemShopStandPrice,
+                    worlds,
+                    rank_maps[ItemSellRank],
                 )
             except HTTP_ERRORS as ex:
                 # 403 with an API key can actually be a rate limit...
@@ -403,6 +619,8 @@ def _update_prices(worlds):
                     time.sleep(5)
 
             _log_result(item, buy_updated, sell_updated)
+            # purge the item as soon as its prices are in, not after the run
+            send_purge_paths()
             if errors_total > 20:
                 raise Exception("Aborting due to large number of HTTP errors")
     finally:
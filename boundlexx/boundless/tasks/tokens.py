@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import time
+
+from celery.utils.log import get_task_logger
+from django.conf import settings
+
+from boundlexx.boundless.game import BoundlessClient
+from boundlexx.boundless.game.tokens import query_tokens
+from boundlexx.boundless.metrics import QUERY_TOKEN_REFRESH_SECONDS
+from config.celery_app import app
+
+logger = get_task_logger(__name__)
+
+
+@app.task
+def refresh_query_tokens(usernames=None, force=False):
+    for user_index, username in enumerate(settings.BOUNDLESS_USERNAMES):
+        if usernames is not None and username not in usernames:
+            continue
+
+        try:
+            query_token = query_tokens.get(username)
+            if not (
+                force or query_token is None or query_tokens.needs_refresh(query_token)
+            ):
+                continue
+
+            start = time.monotonic()
+            client = BoundlessClient(user_index=user_index)
+            query_token = client.login()
+            duration = time.monotonic() - start
+
+            # old token stays in use until this point
+            query_tokens.set(query_token)
+            QUERY_TOKEN_REFRESH_SECONDS.observe(duration)
+            logger.info("Refreshed query token for %s (%.2fs)", username, duration)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Could not refresh query token for %s", username)
+        finally:
+            query_tokens.refresh_done(username)
@@ -1,27 +1,32 @@
 from __future__ import annotations
 
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from celery.utils.log import get_task_logger
 from django.conf import settings
 from django.core.cache import cache
+from django.db import connection, transaction
 from django.db.models import Q
 from django.utils import timezone
 from requests.exceptions import HTTPError
 
+from boundlexx.api.utils import collect_purge_paths, send_purge_paths
 from boundlexx.boundless.game import BoundlessClient
 from boundlexx.boundless.game import World as SimpleWorld
-from boundlexx.boundless.models import (
-    Color,
-    Settlement,
-    World,
-    WorldDistance,
-    WorldPoll,
-)
+from boundlexx.boundless.game.accounts import account_pool, get_account_count
+from boundlexx.boundless.metrics import WORLD_POLL_STAGE_SECONDS
+from boundlexx.boundless.models import Settlement, World, WorldDistance, WorldPoll
 from boundlexx.boundless.utils import GameErrorHandler
 from boundlexx.notifications.models import ExoworldExpiredNotification
 from config.celery_app import app
 
 logger = get_task_logger(__name__)
 
+# put on the poll queue by each fetcher once it has gone through its worlds
+FETCH_DONE = object()
+
 
 def _get_search_ids():
     existing_worlds = World.objects.filter(
@@ -176,15 +181,26 @@ def get_worlds(ids_to_scan, client=None):
     return worlds
 
 
+def _due_worlds(worlds):
+    # each world has its own poll delay based on how active it is, only poll
+    # the ones that are due
+    return worlds.filter(next_poll__lte=timezone.now())
+
+
 @app.task
 def poll_perm_worlds():
-    _poll_with_lock("perm", World.objects.filter(end__isnull=True, active=True))
+    _poll_with_lock(
+        "perm", _due_worlds(World.objects.filter(end__isnull=True, active=True))
+    )
 
 
 @app.task
 def poll_exo_worlds():
     _poll_with_lock(
-        "exo", World.objects.filter(owner__isnull=True, end__isnull=False, active=True)
+        "exo",
+        _due_worlds(
+            World.objects.filter(owner__isnull=True, end__isnull=False, active=True)
+        ),
     )
 
 
@@ -192,7 +208,9 @@ def poll_exo_worlds():
 def poll_sovereign_worlds():
     _poll_with_lock(
         "sovereign",
-        World.objects.filter(owner__isnull=False, is_creative=False, active=True),
+        _due_worlds(
+            World.objects.filter(owner__isnull=False, is_creative=False, active=True)
+        ),
     )
 
 
@@ -200,7 +218,9 @@ def poll_sovereign_worlds():
 def poll_creative_worlds():
     _poll_with_lock(
         "creative",
-        World.objects.filter(owner__isnull=False, is_creative=True, active=True),
+        _due_worlds(
+            World.objects.filter(owner__isnull=False, is_creative=True, active=True)
+        ),
     )
 
 
@@ -217,8 +237,10 @@ def poll_worlds(world_ids=None):
             )
         ).update(active=True)
 
-        worlds = World.objects.filter(
-            Q(active=True) | Q(end__isnull=False, end__gt=timezone.now())
+        worlds = _due_worlds(
+            World.objects.filter(
+                Q(active=True) | Q(end__isnull=False, end__gt=timezone.now())
+            )
         ).order_by("id")
     else:
         worlds = World.objects.filter(id__in=world_ids).order_by("id")
@@ -290,7 +312,12 @@ def _mark_world_inactive(world):
         wp = world.worldpoll_set.all().order_by("time").first()
         if wp is not None:
             resources = wp.resources
-        ExoworldExpiredNotification.objects.send_notification(world, resources)
+
+        transaction.on_commit(
+            lambda: ExoworldExpiredNotification.objects.send_notification(
+                world, resources
+            )
+        )
 
 
 def _poll_world(client, world):
@@ -342,47 +369,145 @@ def _poll_worlds(worlds):
         _split_polls(worlds)
         return
 
-    client = BoundlessClient()
-    logger.info("Boundless user: %s", client.user["boundless"]["username"])
-
     error_handler = GameErrorHandler(
         rd_callback=_handle_rd,
         http_callback=_handle_error,
         error_callback=_handle_error,
     )
     poll_world = error_handler(_poll_world)
+
+    worlds = list(worlds)
+    fetchers = min(get_account_count(), len(worlds))
+    if fetchers == 0:
+        if len(worlds) > 0:
+            logger.error("No Boundless accounts configured, cannot poll worlds")
+        return
+
+    pending: queue.Queue = queue.Queue()
     for index, world in enumerate(worlds):
-        WorldPoll.objects.filter(world=world, active=True).update(active=False)
+        pending.put((index, world))
+
+    # fetching from the game API and writing to the DB overlap: a fetcher per
+    # account queues up responses and this thread writes them out
+    polls: queue.Queue = queue.Queue(maxsize=settings.BOUNDLESS_WORLD_POLL_QUEUE_SIZE)
+    stop = threading.Event()
+
+    # next polls are scheduled from when the run started so they line up
+    # with the beat schedule
+    started = timezone.now()
+    with ThreadPoolExecutor(max_workers=fetchers) as executor:
+        futures = [
+            executor.submit(_fetch_worlds, poll_world, pending, total, polls, stop)
+            for _ in range(fetchers)
+        ]
+
+        try:
+            with collect_purge_paths():
+                _write_polls(polls, len(futures), started)
+        finally:
+            stop.set()
 
-        logger.info("Polling world %s (%s/%s)", world.display_name, index + 1, total)
-        response = poll_world(client=client, world=world)
+        for future in futures:
+            future.result()
+
+
+def _put_poll(polls, item, stop):
+    with WORLD_POLL_STAGE_SECONDS.labels(stage="fetch_wait").time():
+        while not stop.is_set():
+            try:
+                polls.put(item, timeout=1)
+            except queue.Full:
+                continue
+            return
+
+
+def _fetch_worlds(  # pylint: disable=too-many-arguments
+    poll_world, pending, total, polls, stop
+):
+    try:
+        while not stop.is_set():
+            try:
+                index, world = pending.get_nowait()
+            except queue.Empty:
+                return
+
+            # accounts are leased per world so other poll runs going at the
+            # same time can share them instead of waiting for this whole run
+            with account_pool.lease(max_accounts=1) as user_indexes:
+                client = BoundlessClient(user_index=user_indexes[0])
+
+                logger.info(
+                    "Polling world %s (%s/%s, %s)",
+                    world.display_name,
+                    index + 1,
+                    total,
+                    client.user["boundless"]["username"],
+                )
+                with WORLD_POLL_STAGE_SECONDS.labels(stage="fetch").time():
+                    response = poll_world(client=client, world=world)
+
+            _put_poll(polls, (world, response), stop)
+    finally:
+        _put_poll(polls, FETCH_DONE, stop)
+        connection.close()
 
-        if response.has_error:
-            continue
 
-        world_data, poll_data = response.response
-        if world_data is None:
-            _mark_world_inactive(world)
+def _write_polls(polls, fetchers, started):
+    while fetchers > 0:
+        with WORLD_POLL_STAGE_SECONDS.labels(stage="write_wait").time():
+            item = polls.get()
+
+        if item is FETCH_DONE:
+            fetchers -= 1
             continue
 
+        world, response = item
+        with WORLD_POLL_STAGE_SECONDS.labels(stage="write").time():
+            # one world failing to write does not roll back the others
+            try:
+                with transaction.atomic():
+                    _write_poll(world, response, started)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Could not write poll for world %s", world)
+
+        # purge the world as soon as it is written, not after the run
+        send_purge_paths()
+
+
+def _write_poll(world, response, started):
+    previous = (
+        WorldPoll.objects.filter(world=world, active=True).order_by("-time").first()
+    )
+    WorldPoll.objects.filter(world=world, active=True).update(active=False)
+
+    if response.has_error:
+        return
+
+    world_data, poll_data = response.response
+    if world_data is None:
+        _mark_world_inactive(world)
+        return
+
+    try:
+        world, _ = World.objects.get_or_create_from_game_dict(world_data)
+    except Exception:
+        logger.warning(world_data)
+        raise
+
+    if world.is_locked or (world.end is not None and timezone.now() > world.end):
+        logger.info("World %s expired, not polling...", world)
+        return
+
+    if poll_data is not None:
         try:
-            world, _ = World.objects.get_or_create_from_game_dict(world_data)
+            world_poll = WorldPoll.objects.create_from_game_dict(
+                world_data, poll_data, world=world
+            )
         except Exception:
-            logger.warning(world_data)
+            logger.warning(poll_data)
             raise
 
-        if world.is_locked or (world.end is not None and timezone.now() > world.end):
-            logger.info("World %s expired, not polling...", world)
-            continue
-
-        if poll_data is not None:
-            try:
-                WorldPoll.objects.create_from_game_dict(
-                    world_data, poll_data, world=world
-                )
-            except Exception:
-                logger.warning(poll_data)
-                raise
+        world.schedule_poll(world_poll.has_activity_since(previous), last_poll=started)
 
 
 @app.task
@@ -443,7 +568,6 @@ def poll_settlements(world_ids=None):
         worlds = World.objects.filter(id__in=world_ids)
 
     client = BoundlessClient()
-    colors = Color.objects.all()
 
     error_handler = GameErrorHandler(
         rd_callback=_handle_rd,
@@ -453,7 +577,22 @@ def poll_settlements(world_ids=None):
 
     @error_handler
     def _poll_settlements(client, world):
-        return client.get_world_settlements(SimpleWorld(world.id, world.api_url))
+        # settlements are decoded as they are downloaded, but the whole
+        # download has to finish before anything is replaced so the
+        # transaction is not held open over the network
+        settlements = list(
+            client.get_world_settlements(
+                SimpleWorld(world.id, world.api_url), stream=True
+            )
+        )
+
+        with transaction.atomic():
+            Settlement.objects.filter(world=world).delete()
+
+            for settlement in settlements:
+                Settlement.objects.create_from_game_obj(world, settlement)
+
+        return len(settlements)
 
     for world in worlds:
         response = _poll_settlements(client=client, world=world)
@@ -461,10 +600,8 @@ def poll_settlements(world_ids=None):
         if response.has_error:  # pylint: disable=no-member
             continue
 
-        settlements = response.response  # pylint: disable=no-member
-        Settlement.objects.filter(world=world).delete()
-
-        for settlement in settlements:
-            Settlement.objects.create_from_game_obj(world, settlement, colors=colors)
-
-        logger.info("Found %s settlements for %s", len(settlements), world)
+        logger.info(
+            "Found %s settlements for %s",
+            response.response,  # pylint: disable=no-member
+            world,
+        )
@@ -1,12 +1,17 @@
+from __future__ import annotations
+
+import hashlib
 import re
 import struct
+import threading
 import time
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 from datetime import timedelta
 from http.client import RemoteDisconnected
 from io import BytesIO
 from typing import Callable, Optional
 
+from django.conf import settings
 from django.core.cache import cache
 from django.utils.html import escape
 from django.utils.safestring import mark_safe
@@ -14,10 +19,15 @@ from PIL import Image
 from requests.exceptions import ConnectionError as RequestsConnectionError
 
 from boundlexx.boundless.game import HTTP_ERRORS
+from boundlexx.boundless.metrics import NAME_CACHE_HITS, NAME_CACHE_MISSES
 
 ITEM_COLOR_IDS_KEYS = "boundless:block_color_ids"
 ITEM_METAL_IDS_KEYS = "boundless:block_metal_ids"
 WORLD_ITEM_COLOR_IDS_KEYS = "boundless:resource_ids"
+NAME_CATALOG_VERSION_KEY = "boundless:name_catalog_version"
+NAME_CACHE_KEY = "boundless:names"
+# seconds between checking if the color/emoji catalog has changed
+NAME_CATALOG_VERSION_TTL = 30
 FORMATTING_REGEX = r":([^:]*):"
 ERROR_THRESHOLD = 5
 DEFAULT_DELAY = 5
@@ -93,6 +103,8 @@ app_ownership_ticket: {app_ownership_ticket.hex()}
 
 
 def get_next_rank_update(ranks):
+    # the API views prefetch the ranks, so take the minimum in Python rather
+    # than running an aggregate query per item/world
     next_update = None
 
     for item_rank in ranks:
@@ -159,7 +171,92 @@ def get_world_block_color_item_ids():
     return item_ids
 
 
-def color_from_hex_string(hex_string, colors=None):
+def _normalize_color_name(name):
+    return name.replace(" ", "").replace("_", "").lower()
+
+
+NamedColor = namedtuple("NamedColor", ("hex_color", "name"))
+
+
+class NameCatalog:
+    """
+    Precompiled color/emoji lookup tables for `format_name`, so formatting a
+    name does not need any queries.
+
+    * `colors`: normalized localized color name (any language) -> color
+    * `color_ids`: color game ID -> color
+    * `emojis`: emoji name or alt name -> image URL
+
+    Rebuilt whenever the name catalog version changes
+    (`bump_name_catalog_version`).
+    """
+
+    colors: dict[str, NamedColor]
+    color_ids: dict[int, NamedColor]
+    emojis: dict[str, str]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+
+        self.colors = {}
+        self.color_ids = {}
+        self.emojis = {}
+
+    def _build(self):
+        from boundlexx.boundless.models.game import (  # pylint: disable=cyclic-import
+            Color,
+            Emoji,
+            EmojiAltName,
+        )
+
+        colors: dict[str, NamedColor] = {}
+        color_ids: dict[int, NamedColor] = {}
+        for color in Color.objects.all().prefetch_related(
+            "localizedname_set", "colorvalue_set"
+        ):
+            english = color.localized_names.get("english")
+            named_color = NamedColor(
+                color.base_color,
+                None if english is None else _normalize_color_name(english),
+            )
+
+            color_ids[color.game_id] = named_color
+            for localized in color.localizedname_set.all():
+                colors.setdefault(_normalize_color_name(localized.name), named_color)
+
+        emojis: dict[str, str] = {}
+        for emoji in Emoji.objects.filter(active=True).exclude(image=""):
+            emojis.setdefault(emoji.name, emoji.image.url)
+
+        alt_names = EmojiAltName.objects.filter(emoji__active=True).exclude(
+            emoji__image=""
+        )
+        for alt_name in alt_names.select_related("emoji"):
+            emojis.setdefault(alt_name.name, alt_name.emoji.image.url)
+
+        self.colors, self.color_ids, self.emojis = colors, color_ids, emojis
+
+    def load(self) -> NameCatalog:
+        version = get_name_catalog_version()
+
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._build()
+                    self._version = version
+
+        return self
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+
+
+name_catalog = NameCatalog()
+
+
+def color_from_hex_string(hex_string, catalog: NameCatalog):
     color_hex = None
     the_color = None
 
@@ -169,10 +266,7 @@ def color_from_hex_string(hex_string, colors=None):
         pass
     else:
         if len(hex_string) in (1, 2):
-            for color in colors:
-                if color.game_id == int_color:
-                    the_color = color
-                    break
+            the_color = catalog.color_ids.get(int_color)
         elif len(hex_string) == 4:
             color_hex = f"#{hex_string[:3]}"
         elif len(hex_string) == 5:
@@ -183,111 +277,246 @@ def color_from_hex_string(hex_string, colors=None):
     return color_hex, the_color
 
 
-def replace_color(string, format_string, inner, colors, strip):
-    color_name = inner[1:].replace(" ", "").replace("_", "").lower()
-    the_color = None
+def _resolve_color(inner, catalog: NameCatalog):
+    color_name = _normalize_color_name(inner[1:])
     hex_color = None
     the_color_name = None
 
     if color_name == "":
         color_name = "white"
 
-    for color in colors:
-        for localized in color.localizedname_set.all():
-            compare_name = localized.name.replace(" ", "").replace("_", "").lower()
-
-            if color_name == compare_name:
-                the_color = color
-                break
-
-        if the_color is not None:
-            break
+    the_color = catalog.colors.get(color_name)
 
     if the_color is None:
-        hex_color, the_color = color_from_hex_string(color_name, colors=colors)
+        hex_color, the_color = color_from_hex_string(color_name, catalog)
 
     if the_color is not None:
-        hex_color = the_color.base_color
-        the_color_name = (
-            the_color.default_name.replace(" ", "").replace("_", "").lower()
-        )
+        hex_color = the_color.hex_color
+        the_color_name = the_color.name
 
-    if hex_color is not None:
-        if strip:
-            string = string.replace(format_string, "", 1)
-        else:
-            span_tag = f'<span style="color:{hex_color}" color="color">'
-            if the_color_name is not None:
-                span_tag = span_tag.replace('">', f' {the_color_name}">')
+    if hex_color is None:
+        return None
 
-            string = string.replace(format_string, span_tag, 1) + "</span>"
+    span_tag = f'<span style="color:{hex_color}" color="color">'
+    if the_color_name is not None:
+        span_tag = span_tag.replace('">', f' {the_color_name}">')
 
-    return string
+    return span_tag
 
 
-def html_name(string, strip=False, colors=None):
-    from boundlexx.boundless.models.game import (  # pylint: disable=cyclic-import
-        Color,
-        Emoji,
-    )
+def format_name(string) -> tuple[str, str]:
+    """
+    Renders the Boundless formatting (`:#color:`/`:emoji:`) in `string` in a
+    single pass. Returns both the text (formatting stripped) and the HTML.
+    """
 
-    if colors is None:
-        colors = list(
-            Color.objects.all().prefetch_related("localizedname_set", "colorvalue_set")
-        )
-    final_string = str(escape(string[:]))
+    catalog = name_catalog.load()
+    text: list[str] = []
+    html: list[str] = []
+    open_spans = 0
+    last_end = 0
 
     for match in re.finditer(FORMATTING_REGEX, string):
-        format_string = match.group(0)
+        start = match.start()
+        plain = escape(string[last_end:start])
+        text.append(plain)
+        html.append(plain)
+        last_end = match.end()
+
+        format_string = escape(match.group(0))
         inner = match.group(1)
 
         if len(inner) == 0:
-            continue
-
+            text.append(format_string)
+            html.append(format_string)
         # strip all colors
-        if inner[0] == "#":
-            final_string = replace_color(
-                final_string, format_string, inner, colors, strip
-            )
+        elif inner[0] == "#":
+            span_tag = _resolve_color(inner, catalog)
+
+            if span_tag is None:
+                text.append(format_string)
+                html.append(format_string)
+            else:
+                html.append(span_tag)
+                open_spans += 1
         # replace emoji with resolved emoji
         else:
             user_name = inner.lower()
-            try:
-                emoji = Emoji.objects.get_by_name(user_name)
-            except Emoji.DoesNotExist:
-                pass
+            emoji_url = catalog.emojis.get(user_name)
+
+            if emoji_url is None:
+                text.append(format_string)
+                html.append(format_string)
             else:
-                if emoji is not None:
-                    if strip:
-                        final_string = final_string.replace(format_string, inner, 1)
-                    else:
-                        html_emoji = (
-                            f'<img src="{emoji.image.url}" class="emoji"'
-                            f' alt="emoji {user_name}" title="{user_name}">'
-                        )
-                        final_string = final_string.replace(
-                            format_string, html_emoji, 1
-                        )
-
-    return mark_safe(final_string)  # nosec
-
-
-def calculate_extra_names(world, new_name, colors=None):
+                text.append(escape(inner))
+                html.append(
+                    f'<img src="{emoji_url}" class="emoji"'
+                    f' alt="emoji {user_name}" title="{user_name}">'
+                )
+
+    plain = escape(string[last_end:])
+    text.append(plain)
+    html.append(plain)
+    html.append("</span>" * open_spans)
+
+    return "".join(text), "".join(html)
+
+
+_catalog_version: Optional[int] = None
+_catalog_version_checked = 0.0
+
+
+def get_name_catalog_version() -> int:
+    """
+    Current color/emoji catalog version. Only checked against the Django cache
+    every `NAME_CATALOG_VERSION_TTL` seconds.
+    """
+
+    global _catalog_version, _catalog_version_checked  # pylint: disable=global-statement  # noqa: E501
+
+    now = time.monotonic()
+    if (
+        _catalog_version is None
+        or now - _catalog_version_checked > NAME_CATALOG_VERSION_TTL
+    ):
+        _catalog_version = cache.get_or_set(
+            NAME_CATALOG_VERSION_KEY, int(time.time()), timeout=None
+        )
+        _catalog_version_checked = now
+
+    return _catalog_version  # type: ignore
+
+
+class NameCache:
+    """
+    Bounded LRU of `(text, html)` pairs rendered by `format_name`, keyed by
+    `(name, catalog version)`.
+
+    The catalog version is bumped (`bump_name_catalog_version`) whenever a
+    color, color name or emoji changes, which drops every cached name.
+    Other processes notice the bump within `NAME_CATALOG_VERSION_TTL`
+    seconds. With `BOUNDLESS_NAME_CACHE_SHARED`, names missing locally are
+    also looked up in the Django cache before being rendered.
+    """
+
+    max_size: int
+
+    def __init__(self, max_size: Optional[int] = None):
+        if max_size is None:
+            max_size = settings.BOUNDLESS_NAME_CACHE_SIZE
+
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+        self._names: OrderedDict[str, tuple[str, str]] = OrderedDict()
+        self._version: Optional[int] = None
+
+    def _get_version(self) -> int:
+        version = get_name_catalog_version()
+
+        if version != self._version:
+            with self._lock:
+                self._names.clear()
+                self._version = version
+
+        return version
+
+    def _shared_key(self, name: str) -> str:
+        name_hash = hashlib.sha1(name.encode("utf8")).hexdigest()  # nosec
+        return f"{NAME_CACHE_KEY}:{self._get_version()}:{name_hash}"
+
+    def get(self, name: str) -> Optional[tuple[str, str]]:
+        self._get_version()
+
+        with self._lock:
+            rendered = self._names.get(name)
+            if rendered is not None:
+                self._names.move_to_end(name)
+
+        if rendered is not None:
+            NAME_CACHE_HITS.labels(tier="local").inc()
+            return rendered
+
+        if settings.BOUNDLESS_NAME_CACHE_SHARED:
+            rendered = cache.get(self._shared_key(name))
+            if rendered is not None:
+                NAME_CACHE_HITS.labels(tier="shared").inc()
+                self._set_local(name, rendered)
+                return rendered
+
+        NAME_CACHE_MISSES.inc()
+        return None
+
+    def _set_local(self, name: str, rendered: tuple[str, str]):
+        with self._lock:
+            self._names[name] = rendered
+            self._names.move_to_end(name)
+
+            while len(self._names) > self.max_size:
+                self._names.popitem(last=False)
+
+    def set(self, name: str, rendered: tuple[str, str]):  # noqa: A003
+        self._get_version()
+        self._set_local(name, rendered)
+
+        if settings.BOUNDLESS_NAME_CACHE_SHARED:
+            cache.set(self._shared_key(name), rendered, timeout=86400)
+
+    def clear(self):
+        with self._lock:
+            self._names.clear()
+            self._version = None
+
+
+name_cache = NameCache()
+
+
+def bump_name_catalog_version():
+    """
+    Invalidates the name catalog and every name rendered by `format_name` in
+    all processes.
+    """
+
+    global _catalog_version  # pylint: disable=global-statement
+
+    try:
+        cache.incr(NAME_CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(NAME_CATALOG_VERSION_KEY, int(time.time()), timeout=None)
+
+    _catalog_version = None
+    name_catalog.clear()
+    name_cache.clear()
+
+
+def get_names(string) -> tuple[str, str]:
+    """
+    Cached `format_name`, returns the `(text, html)` names for `string`.
+    """
+
+    rendered = name_cache.get(string)
+
+    if rendered is None:
+        rendered = format_name(string)
+        name_cache.set(string, rendered)
+
+    text, html = rendered
+    return mark_safe(text), mark_safe(html)  # nosec
+
+
+def calculate_extra_names(world, new_name):
     if world.display_name != new_name:
         world.text_name = None
         world.sort_name = None
         world.html_name = None
         world.display_name = new_name
 
-    if world.text_name is None:
-        world.text_name = html_name(world.display_name, strip=True, colors=colors)
+    if world.text_name is None or world.html_name is None:
+        world.text_name, world.html_name = get_names(world.display_name)
 
     if world.sort_name is None:
         world.sort_name = world.text_name.lower()
 
-    if world.html_name is None:
-        world.html_name = html_name(world.display_name, colors=colors)
-
     return world
 
 
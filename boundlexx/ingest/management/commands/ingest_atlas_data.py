@@ -14,14 +14,8 @@ from django.core.files.base import ContentFile
 from PIL import Image, ImageDraw, ImageFilter, ImageOps
 
 from boundlexx.api.tasks import purge_static_cache
-from boundlexx.boundless.models import (
-    Beacon,
-    BeaconPlotColumn,
-    BeaconScan,
-    Color,
-    World,
-)
-from boundlexx.boundless.utils import SPHERE_GAP, crop_world, html_name
+from boundlexx.boundless.models import Beacon, BeaconPlotColumn, BeaconScan, World
+from boundlexx.boundless.utils import SPHERE_GAP, crop_world, get_names
 from boundlexx.utils import make_thumbnail
 
 BASE_DIR = "/tmp/maps"
@@ -150,7 +144,6 @@ def _process_beacons(world, root, name):  # pylint: disable=too-many-locals
     num_beacons, world_size = unpack_from("<HH", buffer, offset)
     offset += 4
 
-    colors = Color.objects.all()
     beacons = []
     for _ in range(num_beacons):
         skipped = unpack_from("<H", buffer, offset)[0]
@@ -187,12 +180,13 @@ def _process_beacons(world, root, name):  # pylint: disable=too-many-locals
             name = name.decode("utf-8")
             offset += name_len
 
+            text_name, html_name = get_names(name)
             BeaconScan.objects.create(
                 beacon=beacon,
                 mayor_name=mayor_name,
                 name=name,
-                text_name=html_name(name, strip=True, colors=colors),
-                html_name=html_name(name, colors=colors),
+                text_name=text_name,
+                html_name=html_name,
                 prestige=prestige,
                 compactness=compactness,
                 num_plots=num_plots,
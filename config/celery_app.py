@@ -3,7 +3,12 @@ import os
 
 from celery import Celery
 from celery.app.task import Task
-from celery.signals import after_setup_task_logger, task_postrun
+from celery.signals import (
+    after_setup_task_logger,
+    task_postrun,
+    task_prerun,
+    worker_process_init,
+)
 from django.core.cache import cache
 
 from boundlexx.utils.logging import RedisTaskLogger
@@ -45,6 +50,40 @@ def setup_loggers(logger: logging.Logger, *args, **kwargs):
     logger.addHandler(redis_handler)
 
 
+# pylint: disable=unused-argument
+@worker_process_init.connect
+def export_worker_metrics(*args, **kwargs):
+    # pylint: disable=import-outside-toplevel
+    from django.conf import settings
+    from django_prometheus.exports import SetupPrometheusEndpointOnPortRange
+
+    # metrics from tasks only exist in the worker processes, so each process
+    # needs to serve its own
+    if settings.ENABLE_PROMETHEUS:
+        SetupPrometheusEndpointOnPortRange(settings.PROMETHEUS_WORKER_EXPORT_PORT_RANGE)
+
+
+# pylint: disable=unused-argument
+@task_prerun.connect
+def start_purge_collector(task: Task, *args, **kwargs):
+    # pylint: disable=import-outside-toplevel
+    from boundlexx.api.utils import start_purge_collector as start_collector
+
+    # coalesce CDN purges from the whole task into one
+    if task.name.startswith("boundlexx"):
+        start_collector()
+
+
+# pylint: disable=unused-argument
+@task_postrun.connect
+def flush_purge_collector(task: Task, *args, **kwargs):
+    # pylint: disable=import-outside-toplevel
+    from boundlexx.api.utils import flush_purge_collector as flush_collector
+
+    if task.name.startswith("boundlexx"):
+        flush_collector()
+
+
 # pylint: disable=unused-argument
 @task_postrun.connect
 def after_task(task_id: str, task: Task, *args, **kwargs):
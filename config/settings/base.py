@@ -24,6 +24,14 @@ if READ_DOT_ENV_FILE:
 DEBUG = env.bool("DJANGO_DEBUG", False)
 
 ENABLE_PROMETHEUS = env.bool("ENABLE_PROMETHEUS", default=False)
+# Celery worker processes do not serve `/metrics`, each one exports its own
+# metrics on the first free port starting at this one instead
+PROMETHEUS_WORKER_EXPORT_PORT = int(env("PROMETHEUS_WORKER_EXPORT_PORT", default=9100))
+PROMETHEUS_WORKER_EXPORT_PORT_RANGE = range(
+    PROMETHEUS_WORKER_EXPORT_PORT,
+    PROMETHEUS_WORKER_EXPORT_PORT
+    + int(env("PROMETHEUS_WORKER_EXPORT_PORT_COUNT", default=16)),
+)
 # Local time zone. Choices are
 # http://en.wikipedia.org/wiki/List_of_tz_zones_by_name
 # though not all of them may be available with every OS.
@@ -74,6 +82,10 @@ AZURE_CDN_RESOURCE_GROUP = env("AZURE_CDN_RESOURCE_GROUP", default=None)
 AZURE_CDN_PROFILE_NAME = env("AZURE_CDN_PROFILE_NAME", default=None)
 AZURE_CDN_ENDPOINT_NAME = env("AZURE_CDN_ENDPOINT_NAME", default=None)
 AZURE_CDN_DYNAMIC_PURGE = env.bool("AZURE_CDN_DYNAMIC_PURGE", False)
+# paths collected by a task are purged once there are this many of them or
+# the oldest has been held for this many seconds, instead of at task end
+AZURE_CDN_PURGE_MAX_PATHS = int(env("AZURE_CDN_PURGE_MAX_PATHS", default=100))
+AZURE_CDN_PURGE_MAX_AGE = int(env("AZURE_CDN_PURGE_MAX_AGE", default=30))
 AZURE_STATIC_CDN_RESOURCE_GROUP = env(
     "AZURE_STATIC_CDN_RESOURCE_GROUP", default=AZURE_CDN_RESOURCE_GROUP
 )
@@ -435,10 +447,44 @@ BOUNDLESS_ACCOUNTS_BASE_URL = "https://account.playboundless.com"
 BOUNDLESS_USERNAMES = env.list("BOUNDLESS_USERNAMES", default=[])
 BOUNDLESS_PASSWORDS = env.list("BOUNDLESS_PASSWORDS", default=[])
 BOUNDLESS_DS_REQUIRES_AUTH = env.bool("BOUNDLESS_DS_REQUIRES_AUTH", default=False)
+# seconds a query token is cached for, tokens are refreshed in the background
+# REFRESH_AHEAD seconds before they expire
+BOUNDLESS_QUERY_TOKEN_LIFETIME = int(
+    env("BOUNDLESS_QUERY_TOKEN_LIFETIME", default=43200)
+)
+BOUNDLESS_QUERY_TOKEN_REFRESH_AHEAD = int(
+    env("BOUNDLESS_QUERY_TOKEN_REFRESH_AHEAD", default=3600)
+)
+# seconds to wait for a free account when sharding polls across accounts
+BOUNDLESS_ACCOUNT_LEASE_TIMEOUT = float(
+    env("BOUNDLESS_ACCOUNT_LEASE_TIMEOUT", default=10.0)
+)
 
 # number of seconds between calls to each world
 BOUNDLESS_API_WORLD_DELAY = float(env("BOUNDLESS_API_WORLD_DELAY", default=1.0))
 BOUNDLESS_API_DS_DELAY = float(env("BOUNDLESS_API_DS_DELAY", default=1.0))
+# API key world delay is learned per world, 403s multiply it by INCREASE
+# successes lower it by DECREASE seconds
+BOUNDLESS_API_WORLD_DELAY_MAX = float(
+    env("BOUNDLESS_API_WORLD_DELAY_MAX", default=30.0)
+)
+BOUNDLESS_API_WORLD_DELAY_INCREASE = float(
+    env("BOUNDLESS_API_WORLD_DELAY_INCREASE", default=2.0)
+)
+BOUNDLESS_API_WORLD_DELAY_DECREASE = float(
+    env("BOUNDLESS_API_WORLD_DELAY_DECREASE", default=0.05)
+)
+# max number of in flight requests for AsyncBoundlessClient
+BOUNDLESS_API_MAX_CONCURRENCY = int(env("BOUNDLESS_API_MAX_CONCURRENCY", default=20))
+# keep alive connection pools for world/DS API hosts
+BOUNDLESS_API_POOL_MAX_HOSTS = int(env("BOUNDLESS_API_POOL_MAX_HOSTS", default=200))
+BOUNDLESS_API_POOL_MAX_CONNECTIONS = int(
+    env("BOUNDLESS_API_POOL_MAX_CONNECTIONS", default=4)
+)
+# seconds
+BOUNDLESS_API_POOL_IDLE_TIMEOUT = float(
+    env("BOUNDLESS_API_POOL_IDLE_TIMEOUT", default=60.0)
+)
 BOUNDLESS_LOCATION = "/boundless/"
 BOUNDLESS_WORLDS_LOCATIONS = "/boundless-worlds/"
 BOUNDLESS_ICONS_LOCATION = "/boundless-icons/"
@@ -525,17 +571,46 @@ BOUNDLESS_DEFAULT_COLORS = {
 
 # timeout for making an API request
 BOUNDLESS_API_TIMEOUT = 5
+# record/replay all Boundless API responses, "record" or "replay"
+BOUNDLESS_CASSETTE_MODE = env("BOUNDLESS_CASSETTE_MODE", default=None)
+BOUNDLESS_CASSETTE_PATH = env(
+    "BOUNDLESS_CASSETTE_PATH", default=str(ROOT_DIR / "cassettes")
+)
+# replay speed multiplier for recorded latency, 0 for no delay
+BOUNDLESS_CASSETTE_SPEED = float(env("BOUNDLESS_CASSETTE_SPEED", default=1.0))
+# max number of rendered beacon/settlement names kept per process
+BOUNDLESS_NAME_CACHE_SIZE = int(env("BOUNDLESS_NAME_CACHE_SIZE", default=20000))
+# also share rendered names between processes through the Django cache
+BOUNDLESS_NAME_CACHE_SHARED = env.bool("BOUNDLESS_NAME_CACHE_SHARED", default=False)
 BOUNDLESS_AUTH_AUTO_CREATE = True
 
 # minutes
 BOUNDLESS_API_KEY = env("BOUNDLESS_API_KEY", default=None)
 BOUNDLESS_MAX_WORLDS_PER_POLL = int(env("BOUNDLESS_MAX_WORLDS_PER_POLL", default=100))
+# delay between polls for a world with activity (player, beacon or prestige
+# changes), doubles for every poll in a row without any up to the max delay
+BOUNDLESS_MIN_WORLD_POLL_DELAY = int(env("BOUNDLESS_MIN_WORLD_POLL_DELAY", default=1))
+BOUNDLESS_MAX_WORLD_POLL_DELAY = int(env("BOUNDLESS_MAX_WORLD_POLL_DELAY", default=60))
+# world poll responses fetched but not written yet before fetchers wait on
+# the DB, each world is written in its own transaction
+BOUNDLESS_WORLD_POLL_QUEUE_SIZE = int(
+    env("BOUNDLESS_WORLD_POLL_QUEUE_SIZE", default=20)
+)
 BOUNDLESS_MAX_PERM_WORLDS_PER_PRICE_POLL = int(
     env("BOUNDLESS_MAX_PERM_WORLDS_PER_PRICE_POLL", default=10)
 )
 BOUNDLESS_MAX_SOV_WORLDS_PER_PRICE_POLL = int(
     env("BOUNDLESS_MAX_SOV_WORLDS_PER_PRICE_POLL", default=100)
 )
+# number of worlds polled at once for an item during a price run, 1 to poll
+# them one after another
+BOUNDLESS_PRICE_POLL_CONCURRENCY = int(
+    env("BOUNDLESS_PRICE_POLL_CONCURRENCY", default=8)
+)
+# approximate number of price changes kept in the price change stream
+BOUNDLESS_PRICE_STREAM_MAX_LENGTH = int(
+    env("BOUNDLESS_PRICE_STREAM_MAX_LENGTH", default=100000)
+)
 BOUNDLESS_MIN_ITEM_DELAY = int(env("BOUNDLESS_MIN_ITEM_DELAY", default=20))
 BOUNDLESS_BASE_ITEM_DELAY = int(env("BOUNDLESS_BASE_ITEM_DELAY", default=60))
 BOUNDLESS_POPULAR_ITEM_DELAY_OFFSET = int(
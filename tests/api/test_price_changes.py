@@ -0,0 +1,14 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+
+class TestPriceChanges(TestCase):
+    @patch("boundlexx.api.v2.views.shop.price_changes.read", return_value=[])
+    def test_never_cached(self, read):
+        response = self.client.get(reverse("v2:price-change-list"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("no-store", response["Cache-Control"])
+        read.assert_called_once_with(since=None, count=100)
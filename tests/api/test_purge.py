@@ -0,0 +1,64 @@
+from unittest.mock import patch
+
+import pytest
+
+from boundlexx.api.utils import collect_purge_paths, queue_purge_paths, send_purge_paths
+
+# not wrapped in a transaction, so purges are queued right away
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def queued(settings):
+    settings.AZURE_CDN_DYNAMIC_PURGE = True
+    settings.AZURE_CDN_PURGE_MAX_PATHS = 3
+    settings.AZURE_CDN_PURGE_MAX_AGE = 60
+
+    with patch("boundlexx.api.utils._queue_purge_paths") as mock_queue:
+        yield mock_queue
+
+
+def _batches(mock_queue):
+    return [c.args[0] for c in mock_queue.call_args_list]
+
+
+def test_collect_purge_paths_dedupes(queued):
+    with collect_purge_paths():
+        queue_purge_paths(["/a", "/b"])
+        queue_purge_paths(["/a"])
+
+        assert _batches(queued) == []
+
+    assert _batches(queued) == [{"/a", "/b"}]
+
+
+def test_send_purge_paths_keeps_collecting(queued):
+    with collect_purge_paths():
+        queue_purge_paths(["/a"])
+        send_purge_paths()
+        send_purge_paths()
+        queue_purge_paths(["/b"])
+
+        assert _batches(queued) == [{"/a"}]
+
+    assert _batches(queued) == [{"/a"}, {"/b"}]
+
+
+def test_collect_purge_paths_max_paths(queued):
+    with collect_purge_paths():
+        queue_purge_paths(["/a", "/b"])
+        queue_purge_paths(["/c"])
+        queue_purge_paths(["/d"])
+
+        assert _batches(queued) == [{"/a", "/b", "/c"}]
+
+    assert _batches(queued) == [{"/a", "/b", "/c"}, {"/d"}]
+
+
+def test_collect_purge_paths_max_age(queued, settings):
+    settings.AZURE_CDN_PURGE_MAX_AGE = 0
+
+    with collect_purge_paths():
+        queue_purge_paths(["/a"])
+
+        assert _batches(queued) == [{"/a"}]
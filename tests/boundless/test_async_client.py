@@ -0,0 +1,124 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+
+from boundlexx.boundless.game import World
+from boundlexx.boundless.game.async_client import AsyncBoundlessClient
+from boundlexx.boundless.game.models import SHOP_HEADER, SHOP_RECORD
+
+
+@pytest.fixture(autouse=True)
+def no_delay(settings):
+    settings.BOUNDLESS_API_WORLD_DELAY = 0
+    settings.BOUNDLESS_API_KEY = None
+    settings.BOUNDLESS_CASSETTE_MODE = None
+
+
+def _shop_body(name=b"Shop", tag=b"TAG"):
+    return (
+        SHOP_HEADER.pack(len(name), len(tag))
+        + name
+        + tag
+        + SHOP_RECORD.pack(10, 2, 12345, 5, -6, 7)
+    )
+
+
+def _client(transport):
+    client = AsyncBoundlessClient(client=MagicMock(), max_concurrency=2)
+    client._http = httpx.AsyncClient(  # pylint: disable=protected-access
+        transport=transport
+    )
+
+    return client
+
+
+def _run(client, coro):
+    async def run():
+        async with client:
+            return await coro
+
+    return asyncio.run(run())
+
+
+def test_gather_keeps_order_and_returns_exceptions():
+    def handler(request):
+        if request.url.host == "world2":
+            return httpx.Response(500, request=request)
+        return httpx.Response(
+            200,
+            headers={"Content-Type": "application/octet-stream"},
+            content=_shop_body(name=request.url.host.encode("latin1")),
+            request=request,
+        )
+
+    worlds = [World(i, f"http://world{i}/api") for i in range(1, 4)]
+    client = _client(httpx.MockTransport(handler))
+
+    results = _run(client, client.gather("shop_buy", worlds, 1))
+
+    assert [w for w, _ in results] == worlds
+    assert results[0][1][0].beacon_name == "world1"
+    assert isinstance(results[1][1], httpx.HTTPStatusError)
+    assert results[2][1][0].beacon_name == "world3"
+
+
+def test_gather_limits_concurrency():
+    active = 0
+    max_active = 0
+
+    async def handler(request):
+        nonlocal active, max_active
+
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+
+        return httpx.Response(200, json={}, request=request)
+
+    class AsyncMockTransport(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            return await handler(request)
+
+    client = _client(AsyncMockTransport())
+    worlds = [World(i, f"http://world{i}/api") for i in range(1, 7)]
+
+    results = _run(client, client.gather("call_world_api", worlds, "/test"))
+
+    assert len(results) == 6
+    assert max_active == 2
+
+
+def test_rate_limit_reserved_after_semaphore(monkeypatch):
+    active = 0
+    active_at_reserve = []
+
+    async def async_wait(key, delay):
+        active_at_reserve.append(active)
+
+    async def handler(request):
+        nonlocal active
+
+        active += 1
+        await asyncio.sleep(0.01)
+        active -= 1
+
+        return httpx.Response(200, json={}, request=request)
+
+    class AsyncMockTransport(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            return await handler(request)
+
+    monkeypatch.setattr(
+        "boundlexx.boundless.game.async_client.rate_limiter.async_wait", async_wait
+    )
+    client = _client(AsyncMockTransport())
+    worlds = [World(i, f"http://world{i}/api") for i in range(1, 7)]
+
+    _run(client, client.gather("call_world_api", worlds, "/test"))
+
+    # a slot is only reserved once it can be used right away
+    assert len(active_at_reserve) == 6
+    assert max(active_at_reserve) < 2
@@ -0,0 +1,110 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+from django.utils import timezone
+
+from boundlexx.boundless.game.cassette import (
+    MODE_RECORD,
+    MODE_REPLAY,
+    Cassette,
+    UnrecordedRequestException,
+)
+from boundlexx.boundless.management.commands.run_cassette import (
+    SPLIT_TASKS,
+    run_inline,
+    shift_now,
+)
+from boundlexx.boundless.tasks import shop, worlds
+
+URL = "http://world1/api/test"
+
+
+def _session(body=b"body"):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "application/octet-stream"
+    response._content = body  # pylint: disable=protected-access
+
+    session = MagicMock()
+    session.request.return_value = response
+
+    return session
+
+
+def _record(path, *urls):
+    cassette = Cassette(path, MODE_RECORD)
+    cassette.mark("update_prices")
+    for url in urls:
+        cassette.request(_session(url.encode("utf8")), "get", url)
+    cassette.close()
+
+
+def test_replay(tmp_path):
+    _record(tmp_path, URL)
+
+    cassette = Cassette(tmp_path, MODE_REPLAY, speed=0)
+    session = _session()
+    response = cassette.request(session, "GET", URL)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/octet-stream"
+    assert response.content == URL.encode("utf8")
+    # the last recording is repeated
+    assert cassette.request(session, "GET", URL).content == URL.encode("utf8")
+    session.request.assert_not_called()
+
+
+def test_replay_unrecorded(tmp_path):
+    _record(tmp_path, URL)
+
+    cassette = Cassette(tmp_path, MODE_REPLAY, speed=0)
+
+    with pytest.raises(UnrecordedRequestException):
+        cassette.request(_session(), "GET", "http://world2/api/test")
+
+
+def test_marks(tmp_path):
+    before = time.time()
+    _record(tmp_path, URL)
+
+    cassette = Cassette(tmp_path, MODE_REPLAY, speed=0)
+
+    assert before <= cassette.marks["update_prices"] <= time.time()
+    # replaying does not add marks
+    cassette.mark("poll_worlds")
+    assert "poll_worlds" not in cassette.marks
+
+
+def test_shift_now():
+    recorded = time.time() - 3600
+
+    with shift_now(recorded):
+        shifted = worlds.timezone.now()
+        shifted_shop = shop.timezone.now()
+        real = timezone.now()
+
+    assert abs(shifted.timestamp() - recorded) < 5
+    assert abs(shifted_shop.timestamp() - recorded) < 5
+    # auto_now fields and anything else outside of the tasks are not shifted
+    assert abs(real.timestamp() - time.time()) < 5
+    assert worlds.timezone is timezone
+
+
+def test_shift_now_restores_on_error():
+    with pytest.raises(RuntimeError), shift_now(time.time() - 3600):
+        raise RuntimeError()
+
+    assert worlds.timezone is timezone
+    assert shop.timezone is timezone
+
+
+def test_run_inline():
+    delays = [task.delay for task in SPLIT_TASKS]
+
+    with pytest.raises(RuntimeError), run_inline(SPLIT_TASKS):
+        assert [task.delay for task in SPLIT_TASKS] == SPLIT_TASKS
+        raise RuntimeError()
+
+    assert [task.delay for task in SPLIT_TASKS] == delays
@@ -0,0 +1,159 @@
+import zlib
+
+import pytest
+
+from boundlexx.boundless.game.models import (
+    SETTLEMENT_HEADER,
+    SETTLEMENT_PREFIX_SIZE,
+    SETTLEMENT_RECORD,
+    SETTLEMENT_WINDOW_SIZE,
+    SHOP_HEADER,
+    SHOP_RECORD,
+    Location,
+    Settlement,
+    ShopItem,
+    ShopRecord,
+)
+
+SHOPS = [
+    ("Shop", "TAG", 10, 2, 12345, 5, -6, 7),
+    ("Caf\xe9 \xff", "", 1, 0, 100, -1000, 1000, 255),
+    ("", "GUILD", 4294967295, 3, -1, 0, 0, 0),
+]
+
+
+def _shop_binary(shops):
+    binary = b""
+    for name, tag, count, activity, price, x, z, y in shops:
+        name_bytes = name.encode("latin1")
+        tag_bytes = tag.encode("latin1")
+        binary += (
+            SHOP_HEADER.pack(len(name_bytes), len(tag_bytes))
+            + name_bytes
+            + tag_bytes
+            + SHOP_RECORD.pack(count, activity, price, x, z, y)
+        )
+
+    return binary
+
+
+def _expected_items(shops):
+    return [
+        ShopItem(name, tag, count, activity, price / 100, Location(x, y, -z))
+        for name, tag, count, activity, price, x, z, y in shops
+    ]
+
+
+class TestShopItem:
+    def test_from_binary(self):
+        items = ShopItem.from_binary(_shop_binary(SHOPS))
+
+        assert items == _expected_items(SHOPS)
+
+    def test_from_binary_empty(self):
+        assert ShopItem.from_binary(b"") == []
+        assert ShopItem.from_binary(b"", lazy=True) == []
+
+    def test_from_binary_lazy(self):
+        records = ShopItem.from_binary(_shop_binary(SHOPS), lazy=True)
+
+        assert all(isinstance(r, ShopRecord) for r in records)
+        assert [r.to_shop_item() for r in records] == _expected_items(SHOPS)
+
+    def test_lazy_attributes(self):
+        record = ShopItem.from_binary(_shop_binary(SHOPS[:1]), lazy=True)[0]
+
+        assert record.beacon_name == "Shop"
+        assert record.guild_tag == "TAG"
+        assert record.item_count == 10
+        assert record.shop_activity == 2
+        assert record.raw_price == 12345
+        assert record.price == 123.45
+        assert record.location == Location(5, 7, 6)
+        # location is only created once
+        assert record.location is record.location
+
+
+def _settlement_binary(settlements):
+    body = SETTLEMENT_HEADER.pack(b"", len(settlements))
+    for name, prestige, x, z in settlements:
+        name_bytes = name.encode("latin1")
+        body += (
+            bytes([len(name_bytes)])
+            + name_bytes
+            + SETTLEMENT_RECORD.pack(prestige, 0, x, z)
+        )
+
+    return b"\x01" * SETTLEMENT_PREFIX_SIZE + zlib.compress(body)
+
+
+def _chunks(binary, size):
+    chunks = []
+    while binary:
+        chunks.append(binary[:size])
+        binary = binary[size:]
+
+    return chunks
+
+
+def _expected_settlements(settlements):
+    return [
+        Settlement(name, prestige, Location(x * 16, None, -z * 16))
+        for name, prestige, x, z in settlements
+    ]
+
+
+# enough to need more then one decompression window
+SETTLEMENTS = [
+    (f"Settlement {i} \xe9" * (i % 5), i * 100, i % 200 - 100, 100 - i % 200)
+    for i in range(5000)
+]
+
+
+class TestSettlement:
+    def test_from_binary(self):
+        binary = _settlement_binary(SETTLEMENTS)
+        assert len(zlib.decompress(binary[5:])) > SETTLEMENT_WINDOW_SIZE
+
+        assert Settlement.from_binary(binary) == _expected_settlements(SETTLEMENTS)
+
+    def test_from_binary_empty(self):
+        assert Settlement.from_binary(_settlement_binary([])) == []
+
+    def test_iter_binary_chunks(self):
+        binary = _settlement_binary(SETTLEMENTS[:50])
+        expected = _expected_settlements(SETTLEMENTS[:50])
+
+        # chunk sizes smaller then the prefix, header and a single record
+        for size in (1, 3, 7, 64, 4096):
+            assert list(Settlement.iter_binary(_chunks(binary, size))) == expected
+
+    def test_iter_binary_is_incremental(self):
+        binary = _settlement_binary(SETTLEMENTS)
+        received = []
+
+        def chunks():
+            for chunk in _chunks(binary, 1024):
+                received.append(chunk)
+                yield chunk
+
+        settlements = Settlement.iter_binary(chunks())
+        first = next(settlements)
+
+        assert first == _expected_settlements(SETTLEMENTS[:1])[0]
+        assert len(received) < len(_chunks(binary, 1024))
+
+    def test_iter_binary_truncated(self):
+        binary = _settlement_binary(SETTLEMENTS[:50])
+        body = zlib.decompress(binary[SETTLEMENT_PREFIX_SIZE:])
+        truncated = b"\x01" * SETTLEMENT_PREFIX_SIZE + zlib.compress(body[:-5])
+
+        with pytest.raises(ValueError):
+            list(Settlement.iter_binary([truncated]))
+
+    def test_iter_binary_cut_stream(self):
+        binary = _settlement_binary(SETTLEMENTS[:50])
+
+        for size in (len(binary) - 1, len(binary) // 2):
+            with pytest.raises(zlib.error):
+                list(Settlement.iter_binary(_chunks(binary[:size], 64)))
@@ -0,0 +1,150 @@
+from unittest.mock import patch
+
+import pytest
+
+from boundlexx.boundless.models import (
+    Item,
+    ResourceCount,
+    World,
+    WorldPoll,
+    WorldPollResult,
+)
+from boundlexx.boundless.models import world as models
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def world():
+    world = World(id=1, display_name="Test", api_url="http://world1/api", size=192)
+    world.save(force=True)
+
+    return world
+
+
+@pytest.fixture
+def resource_items(settings, monkeypatch):
+    settings.BOUNDLESS_WORLD_POLL_RESOURCE_MAPPING = [10, 11, 12]
+    monkeypatch.setattr(models, "_resource_items", None)
+
+    # 12 does not exist
+    return [
+        Item.objects.create(game_id=game_id, string_id=f"ITEM_{game_id}", name="Item")
+        for game_id in (10, 11)
+    ]
+
+
+def _create_resource_counts(world_poll, resources):
+    manager = WorldPoll.objects
+    manager._create_resource_counts(  # pylint: disable=protected-access
+        world_poll, resources
+    )
+
+
+class TestResourceCounts:
+    def test_create(self, world, resource_items):
+        world_poll = WorldPoll.objects.create(world=world)
+
+        _create_resource_counts(world_poll, [30, 10, 0])
+
+        counts = ResourceCount.objects.filter(world_poll=world_poll).order_by("count")
+        assert [(c.item_id, c.count, c.percentage) for c in counts] == [
+            (resource_items[1].id, 10, 25),
+            (resource_items[0].id, 30, 75),
+        ]
+
+    def test_missing_item(self, world, resource_items):
+        world_poll = WorldPoll.objects.create(world=world)
+
+        with pytest.raises(Item.DoesNotExist):
+            _create_resource_counts(world_poll, [30, 10, 5])
+
+    def test_new_item(self, world, resource_items, django_capture_on_commit_callbacks):
+        world_poll = WorldPoll.objects.create(world=world)
+        assert models.get_resource_items()[2] is None
+
+        # ingesting the missing item invalidates the cached items
+        with django_capture_on_commit_callbacks(execute=True):
+            item = Item.objects.create(game_id=12, string_id="ITEM_12", name="Item")
+
+        _create_resource_counts(world_poll, [30, 10, 5])
+
+        assert models.get_resource_items()[2].item_id == item.id
+        assert ResourceCount.objects.filter(world_poll=world_poll).count() == 3
+
+
+def _world_data(players=1):
+    return {"id": 1, "info": {"players": players}}
+
+
+def _poll_data(beacons=1):
+    return {
+        "beacons": beacons,
+        "plots": 2,
+        "prestige": 3,
+        "resources": [],
+        "leaderboard": [],
+    }
+
+
+def _create_poll(world, world_data, poll_data):
+    return WorldPoll.objects.create_from_game_dict(world_data, poll_data, world=world)
+
+
+@pytest.fixture
+def send_exo_notifcation():
+    with patch.object(models, "send_exo_notifcation") as send_exo_notifcation:
+        yield send_exo_notifcation
+
+
+@pytest.fixture
+def poll_world(world, send_exo_notifcation):
+    with patch.object(models, "get_resource_items", return_value=[]), patch(
+        "boundlexx.boundless.tasks.worlds.calculate_distances"
+    ):
+        yield world
+
+
+class TestWorldPollFingerprint:
+    def test_unchanged_poll_is_stored(self, poll_world):
+        first = _create_poll(poll_world, _world_data(), _poll_data())
+        second = _create_poll(poll_world, _world_data(), _poll_data())
+
+        # every poll is still stored, so timeseries stats are not changed
+        assert first.pk != second.pk
+        assert WorldPollResult.objects.filter(world_poll__world=poll_world).count() == 2
+        assert first.fingerprint == second.fingerprint
+        assert not second.has_activity_since(first)
+
+    @pytest.mark.parametrize(
+        "world_data,poll_data",
+        [(_world_data(players=2), _poll_data()), (_world_data(), _poll_data(2))],
+    )
+    def test_changed_poll(self, poll_world, world_data, poll_data):
+        first = _create_poll(poll_world, _world_data(), _poll_data())
+        second = _create_poll(poll_world, world_data, poll_data)
+
+        assert first.fingerprint != second.fingerprint
+        assert second.has_activity_since(first)
+
+    def test_changed_poll_without_activity(self, poll_world):
+        first = _create_poll(poll_world, _world_data(), _poll_data())
+        poll_data = _poll_data()
+        poll_data["plots"] = 5
+        second = _create_poll(poll_world, _world_data(), poll_data)
+
+        assert first.fingerprint != second.fingerprint
+        assert not second.has_activity_since(first)
+
+    def test_sovereign_notification(
+        self, poll_world, send_exo_notifcation, django_capture_on_commit_callbacks
+    ):
+        poll_world.owner = 1
+        poll_world.save(force=True)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            for _ in range(2):
+                _create_poll(poll_world, _world_data(), _poll_data())
+
+        # sent until the notification is marked as sent
+        assert send_exo_notifcation.call_count == 2
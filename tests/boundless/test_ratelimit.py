@@ -0,0 +1,80 @@
+import fakeredis
+import pytest
+
+from boundlexx.boundless.game.ratelimit import (
+    RESERVE_SCRIPT,
+    RateLimiter,
+    _LocalBuckets,
+)
+
+
+@pytest.fixture
+def redis_limiter():
+    client = fakeredis.FakeRedis()
+    limiter = RateLimiter(prefix="test")
+    limiter._script = client.register_script(  # pylint: disable=protected-access
+        RESERVE_SCRIPT
+    )
+
+    return limiter, client
+
+
+@pytest.fixture
+def local_limiter():
+    limiter = RateLimiter(prefix="test")
+    limiter._local = _LocalBuckets()  # pylint: disable=protected-access
+
+    return limiter
+
+
+@pytest.fixture(params=["redis", "local"])
+def limiter(request, redis_limiter, local_limiter):
+    if request.param == "redis":
+        return redis_limiter[0]
+    return local_limiter
+
+
+def test_reserve_paces_requests(limiter):
+    assert limiter.reserve("key", 1.0) == 0
+    assert limiter.reserve("key", 1.0) == pytest.approx(1.0, abs=0.05)
+    assert limiter.reserve("key", 1.0) == pytest.approx(2.0, abs=0.05)
+
+    # keys are paced separately
+    assert limiter.reserve("other", 1.0) == 0
+
+
+def test_reserve_burst(limiter):
+    assert limiter.reserve("key", 1.0, burst=2) == 0
+    assert limiter.reserve("key", 1.0, burst=2) == 0
+    assert limiter.reserve("key", 1.0, burst=2) == pytest.approx(1.0, abs=0.05)
+
+
+def test_reserve_widened_interval(limiter):
+    assert limiter.reserve("key", 1.0) == 0
+    assert limiter.reserve("key", 1.0) == pytest.approx(1.0, abs=0.05)
+
+    # the last slot was at 1s, so the next one has to wait for the new
+    # interval after it, not the old one
+    assert limiter.reserve("key", 3.0) == pytest.approx(4.0, abs=0.05)
+    assert limiter.reserve("key", 3.0) == pytest.approx(7.0, abs=0.05)
+
+
+def test_reserve_narrowed_interval(limiter):
+    assert limiter.reserve("key", 3.0) == 0
+
+    # already reserved slots are kept
+    assert limiter.reserve("key", 1.0) == pytest.approx(3.0, abs=0.05)
+    assert limiter.reserve("key", 1.0) == pytest.approx(4.0, abs=0.05)
+
+
+def test_reserve_legacy_state(redis_limiter):
+    limiter, client = redis_limiter
+
+    # TAT without an interval, from before intervals were stored
+    assert limiter.reserve("key", 1.0) == 0
+    seconds, microseconds = client.time()
+    now = seconds * 1000 + microseconds // 1000
+    client.set("test:key", now + 2000)
+
+    assert limiter.reserve("key", 1.0) == pytest.approx(2.0, abs=0.05)
+    assert client.get("test:key").decode("utf8").endswith(":1000")
@@ -0,0 +1,107 @@
+from dataclasses import replace
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from boundlexx.boundless.game import Location, ShopItem
+from boundlexx.boundless.game import World as SimpleWorld
+from boundlexx.boundless.models import Item, ItemBuyRank, ItemSellRank, World
+from boundlexx.boundless.tasks import shop as tasks
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def items():
+    return [
+        Item.objects.create(game_id=i, string_id=f"ITEM_{i}", name=f"Item {i}")
+        for i in range(1, 4)
+    ]
+
+
+@pytest.fixture
+def worlds():
+    worlds = []
+    for world_id in range(1, 3):
+        world = World(id=world_id, display_name=f"World {world_id}")
+        world.save(force=True)
+        worlds.append(world)
+
+    return worlds
+
+
+def _pairs(rank_klass):
+    return set(rank_klass.objects.values_list("item_id", "world_id"))
+
+
+def test_create_missing_ranks(items, worlds):
+    ItemBuyRank.objects.create(item=items[0], world=worlds[0], rank=5)
+
+    tasks._create_missing_ranks(items, worlds)  # pylint: disable=protected-access
+
+    expected = {(i.id, w.id) for i in items for w in worlds}
+    assert _pairs(ItemBuyRank) == expected
+    assert _pairs(ItemSellRank) == expected
+    # existing ranks are kept
+    assert ItemBuyRank.objects.get(item=items[0], world=worlds[0]).rank == 5
+
+
+def test_create_missing_ranks_complete(items, worlds, django_assert_num_queries):
+    tasks._create_missing_ranks(items, worlds)  # pylint: disable=protected-access
+
+    # only the counts are queried once every world has all of its ranks
+    with django_assert_num_queries(2):
+        tasks._create_missing_ranks(items, worlds)  # pylint: disable=protected-access
+
+
+def test_load_due_ranks(items, worlds):
+    now = timezone.now()
+    for rank_klass in (ItemBuyRank, ItemSellRank):
+        for item, minutes in zip(items, (-30, 30, -10)):
+            rank = rank_klass(item=item, world=worlds[0], rank=10)
+            rank.save()
+            rank_klass.objects.filter(id=rank.id).update(
+                next_update=now + timedelta(minutes=minutes)
+            )
+
+    rank_maps = tasks._load_due_ranks(items, worlds)  # pylint: disable=protected-access
+
+    for rank_klass in (ItemBuyRank, ItemSellRank):
+        assert set(rank_maps[rank_klass].keys()) == {
+            (items[0].id, worlds[0].id),
+            (items[2].id, worlds[0].id),
+        }
+
+    due_items = tasks._get_due_items(  # pylint: disable=protected-access
+        items, rank_maps
+    )
+    assert due_items == [items[0], items[2]]
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"price": 2.5},
+        {"item_count": 2},
+        {"location": Location(1, 2, 4)},
+        {"beacon_name": "Renamed"},
+        {"guild_tag": "NEW"},
+        {"shop_activity": 1},
+    ],
+)
+def test_get_state_hash(changes):
+    item = Item(id=1)
+    world = SimpleWorld(1, "http://world1/api")
+    shop = ShopItem("Shop", "TAG", 1, 0, 1.5, Location(1, 2, 3))
+
+    digest = tasks._get_state_hash(  # pylint: disable=protected-access
+        [shop], world, item
+    )
+
+    assert digest == tasks._get_state_hash(  # pylint: disable=protected-access
+        [shop], world, item
+    )
+    assert digest != tasks._get_state_hash(  # pylint: disable=protected-access
+        [replace(shop, **changes)], world, item
+    )
@@ -0,0 +1,243 @@
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from http.client import RemoteDisconnected
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+
+from boundlexx.boundless.game import Location
+from boundlexx.boundless.game import Settlement as SimpleSettlement
+from boundlexx.boundless.models import Settlement, World, WorldPoll
+from boundlexx.boundless.tasks import worlds as tasks
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def world():
+    world = World(id=1, display_name="Test", api_url="http://world1/api", size=192)
+    world.save(force=True)
+
+    return world
+
+
+class FakeClient:
+    def __init__(self, settlements, error=None):
+        self.settlements = settlements
+        self.error = error
+        self.counts_while_downloading = []
+
+    def get_world_settlements(self, world, stream=False):
+        assert stream
+
+        for settlement in self.settlements:
+            self.counts_while_downloading.append(
+                Settlement.objects.filter(world_id=world.id).count()
+            )
+            yield settlement
+
+        if self.error is not None:
+            raise self.error
+
+
+class FakeGameClient:
+    """
+    Stands in for `BoundlessClient` when polling worlds. `game_data` maps
+    world IDs to the world/poll data the game should return.
+    """
+
+    game_data: dict[int, tuple] = {}
+    user_indexes: list[int] = []
+
+    def __init__(self, user_index=None):
+        self.user = {"boundless": {"username": f"user{user_index}"}}
+        FakeGameClient.user_indexes.append(user_index)
+
+    def get_world_data(self, world):
+        world_data, _ = self.game_data[world.id]
+        if world_data is None:
+            return None
+
+        return {"worldData": world_data, "pollData": f"token{world.id}"}
+
+    def get_world_poll(self, world, poll_token=None):
+        return self.game_data[world.id][1]
+
+
+def _world_data(world_id, players=1):
+    return {
+        "id": world_id,
+        "apiURL": f"http://world{world_id}/api",
+        "info": {"players": players},
+    }
+
+
+def _poll_data(beacons=1, plots=2, prestige=3):
+    return {
+        "beacons": beacons,
+        "plots": plots,
+        "prestige": prestige,
+        "resources": [],
+        "leaderboard": [],
+    }
+
+
+@pytest.fixture
+def leases():
+    lock = threading.Lock()
+    state = {"active": 0, "max_active": 0, "leases": []}
+
+    @contextmanager
+    def lease(max_accounts=None, timeout=None):
+        with lock:
+            state["leases"].append(max_accounts)
+            state["active"] += 1
+            state["max_active"] = max(state["max_active"], state["active"])
+        try:
+            yield [len(state["leases"]) % 2]
+        finally:
+            with lock:
+                state["active"] -= 1
+
+    with patch.object(tasks.account_pool, "lease", lease):
+        yield state
+
+
+@pytest.fixture
+def game(settings, leases):
+    settings.BOUNDLESS_USERNAMES = ["user0", "user1"]
+    FakeGameClient.game_data = {}
+    FakeGameClient.user_indexes = []
+
+    def get_or_create(world_dict):
+        return World.objects.get(id=world_dict["id"]), False
+
+    with patch.object(tasks, "BoundlessClient", FakeGameClient), patch.object(
+        World.objects, "get_or_create_from_game_dict", get_or_create
+    ), patch(
+        "boundlexx.boundless.models.world.get_resource_items", return_value=[]
+    ), patch(
+        "boundlexx.boundless.models.world.send_exo_notifcation"
+    ), patch.object(
+        tasks, "calculate_distances"
+    ):
+        yield FakeGameClient.game_data
+
+
+def _worlds(count):
+    worlds = []
+    for world_id in range(1, count + 1):
+        world = World(
+            id=world_id,
+            display_name=f"World {world_id}",
+            api_url=f"http://world{world_id}/api",
+            size=192,
+            active=True,
+        )
+        world.save(force=True)
+        worlds.append(world)
+
+    return worlds
+
+
+def _settlement(name, prestige=1000):
+    return SimpleSettlement(name, prestige, Location(16, None, -16))
+
+
+def _poll(world, client):
+    with patch.object(tasks, "BoundlessClient", return_value=client):
+        tasks.poll_settlements([world.id])
+
+
+class TestPollSettlements:
+    def test_replaces_settlements(self, world):
+        Settlement.objects.create_from_game_obj(world, _settlement("Old"))
+        client = FakeClient([_settlement("New 1"), _settlement("New 2")])
+
+        _poll(world, client)
+
+        names = set(Settlement.objects.filter(world=world).values_list("name"))
+        assert names == {("New 1",), ("New 2",)}
+        # old settlements are only removed once the download is done
+        assert client.counts_while_downloading == [1, 1]
+
+    def test_failed_download_keeps_settlements(self, world):
+        Settlement.objects.create_from_game_obj(world, _settlement("Old"))
+        client = FakeClient(
+            [_settlement("New 1")], error=RemoteDisconnected("disconnected")
+        )
+
+        _poll(world, client)
+
+        names = list(Settlement.objects.filter(world=world).values_list("name"))
+        assert names == [("Old",)]
+
+
+class TestPollWorlds:
+    def test_leases_one_account_per_world(self, game, leases):
+        worlds = _worlds(3)
+        for world in worlds:
+            game[world.id] = (_world_data(world.id), _poll_data())
+
+        tasks._poll_worlds(World.objects.all())  # pylint: disable=protected-access
+
+        assert leases["leases"] == [1, 1, 1]
+        assert leases["active"] == 0
+        assert len(FakeGameClient.user_indexes) == 3
+        assert WorldPoll.objects.count() == 3
+
+    def test_write_failure_only_skips_world(
+        self, game, django_capture_on_commit_callbacks
+    ):
+        worlds = _worlds(3)
+        for world in worlds:
+            world.owner = 1
+            world.save(force=True)
+            game[world.id] = (_world_data(world.id), _poll_data())
+
+        schedule_poll = World.schedule_poll
+
+        def broken_schedule_poll(world, *args, **kwargs):
+            if world.id == 2:
+                raise ValueError("broken")
+            return schedule_poll(world, *args, **kwargs)
+
+        with patch.object(World, "schedule_poll", broken_schedule_poll), patch(
+            "boundlexx.boundless.models.world.send_exo_notifcation"
+        ) as send_exo_notifcation:
+            with django_capture_on_commit_callbacks(execute=True):
+                tasks._poll_worlds(  # pylint: disable=protected-access
+                    World.objects.all()
+                )
+
+                # notifications wait for the poll to be committed
+                send_exo_notifcation.assert_not_called()
+
+        polls = WorldPoll.objects.all()
+        assert sorted(p.world_id for p in polls) == [1, 3]
+        # the notification for the world that failed is rolled back with it
+        notified = [c.args[0].world_id for c in send_exo_notifcation.mock_calls]
+        assert sorted(notified) == [1, 3]
+
+    def test_expired_notification_waits_for_commit(
+        self, game, django_capture_on_commit_callbacks
+    ):
+        world = _worlds(1)[0]
+        world.end = timezone.now() - timedelta(days=1)
+        world.save(force=True)
+        game[world.id] = (None, None)
+
+        with patch.object(
+            tasks.ExoworldExpiredNotification.objects, "send_notification"
+        ) as send_notification:
+            with django_capture_on_commit_callbacks(execute=True):
+                tasks._poll_worlds(  # pylint: disable=protected-access
+                    World.objects.all()
+                )
+
+                send_notification.assert_not_called()
+
+        send_notification.assert_called_once()
+        assert not World.objects.get(id=world.id).active
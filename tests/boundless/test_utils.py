@@ -0,0 +1,150 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from boundlexx.boundless import utils
+from boundlexx.boundless.models import Item, ItemSellRank, World
+from boundlexx.boundless.utils import (
+    NameCache,
+    NameCatalog,
+    NamedColor,
+    bump_name_catalog_version,
+    format_name,
+    get_next_rank_update,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def item():
+    item = Item.objects.create(game_id=1, string_id="ITEM_1", name="Item")
+
+    now = timezone.now()
+    for world_id, minutes in ((1, 30), (2, 10)):
+        World(id=world_id, display_name=f"World {world_id}").save(force=True)
+        ItemSellRank.objects.create(
+            item=item,
+            world_id=world_id,
+            rank=10,
+            last_update=now - timedelta(minutes=minutes),
+        )
+
+    return item
+
+
+def test_get_next_rank_update(item, django_assert_num_queries):
+    expected = min(r.next_update for r in ItemSellRank.objects.all()) + timedelta(
+        minutes=5
+    )
+
+    with django_assert_num_queries(1):
+        assert get_next_rank_update(item.itemsellrank_set.all()) == expected
+
+
+def test_get_next_rank_update_prefetched(item, django_assert_num_queries):
+    expected = get_next_rank_update(item.itemsellrank_set.all())
+    item = Item.objects.prefetch_related("itemsellrank_set").get(id=item.id)
+
+    with django_assert_num_queries(0):
+        assert get_next_rank_update(item.itemsellrank_set.all()) == expected
+        assert get_next_rank_update(list(item.itemsellrank_set.all())) == expected
+
+
+def test_get_next_rank_update_empty(django_assert_num_queries):
+    item = Item.objects.create(game_id=1, string_id="ITEM_1", name="Item")
+    item = Item.objects.prefetch_related("itemsellrank_set").get(id=item.id)
+
+    with django_assert_num_queries(0):
+        assert get_next_rank_update(item.itemsellrank_set.all()) is None
+    assert get_next_rank_update(ItemSellRank.objects.none()) is None
+
+
+@pytest.fixture
+def names(settings):
+    settings.BOUNDLESS_NAME_CACHE_SHARED = False
+    cache.clear()
+    bump_name_catalog_version()
+
+    return NameCache(max_size=2)
+
+
+class TestNameCache:
+    def test_get_set(self, names):
+        assert names.get("name") is None
+
+        names.set("name", ("text", "html"))
+
+        assert names.get("name") == ("text", "html")
+
+    def test_max_size(self, names):
+        names.set("name 1", ("text 1", "html 1"))
+        names.set("name 2", ("text 2", "html 2"))
+        # name 1 is now the most recently used
+        names.get("name 1")
+        names.set("name 3", ("text 3", "html 3"))
+
+        assert names.get("name 1") == ("text 1", "html 1")
+        assert names.get("name 2") is None
+        assert names.get("name 3") == ("text 3", "html 3")
+
+    def test_catalog_version_bump(self, names):
+        names.set("name", ("text", "html"))
+
+        bump_name_catalog_version()
+
+        assert names.get("name") is None
+
+    def test_shared(self, names, settings):
+        settings.BOUNDLESS_NAME_CACHE_SHARED = True
+        names.set("name", ("text", "html"))
+
+        other = NameCache(max_size=2)
+
+        assert other.get("name") == ("text", "html")
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    catalog = NameCatalog()
+    red = NamedColor("#ff0000", "red")
+    catalog.colors = {"red": red, "white": NamedColor("#ffffff", "white")}
+    catalog.color_ids = {1: red}
+    catalog.emojis = {"smile": "/emoji/smile.png"}
+
+    monkeypatch.setattr(utils.name_catalog, "load", lambda: catalog)
+
+    return catalog
+
+
+RED = '<span style="color:#ff0000" color="color red">'
+SMILE = '<img src="/emoji/smile.png" class="emoji" alt="emoji smile" title="smile">'
+
+
+@pytest.mark.parametrize(
+    "name,text,html",
+    [
+        ("Plain <b>", "Plain &lt;b&gt;", "Plain &lt;b&gt;"),
+        (":#red:Red", "Red", f"{RED}Red</span>"),
+        (":#Red:A:#01:B", "AB", f"{RED}A{RED}B</span></span>"),
+        (
+            ":#:White",
+            "White",
+            '<span style="color:#ffffff" color="color white">White</span>',
+        ),
+        (
+            ":#00ff00:Green",
+            "Green",
+            '<span style="color:#00ff00" color="color">Green</span>',
+        ),
+        (":#nope:Name", ":#nope:Name", ":#nope:Name"),
+        ("A :smile: B", "A smile B", f"A {SMILE} B"),
+        (":SMILE:", "SMILE", SMILE),
+        (":nope: ::", ":nope: ::", ":nope: ::"),
+        ("Time 12:30:45", "Time 12:30:45", "Time 12:30:45"),
+    ],
+)
+def test_format_name(catalog, name, text, html):
+    assert format_name(name) == (text, html)